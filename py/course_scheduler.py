@@ -12,6 +12,18 @@ Closely follows this problem setup: https://leetcode.com/problems/course-schedul
 # Imports
 import json
 import sys
+import mmap
+import heapq
+import struct
+import argparse
+import itertools
+from array import array
+
+# Optional dependency for the vectorized scheduler of CourseGraph
+try:
+	import numpy as np
+except ImportError:
+	np = None
 
 def err_print(*args, **kwargs):
 	"""
@@ -59,6 +71,158 @@ def schedule(graph):
 	
 	return order if ctr == numCourses else []
 
+class IncrementalSchedule(object):
+	"""
+	Incremental topological order of courses, kept valid across prerequisite edits
+
+	Instead of rerunning schedule() after every change, adding a prerequisite only repairs the part
+	of the order between the two courses, and detects a cycle before the prerequisite is accepted;
+	removing a prerequisite or adding a course never invalidates the order
+	Algorithm: Pearce and Kelly, A Dynamic Topological Sort Algorithm for Directed Acyclic Graphs (2006)
+	Complexity: O(1) to add a course or remove a prerequisite; adding a prerequisite only visits the
+	courses ordered between the two courses (O(V+E) in the worst case, usually far less)
+	"""
+
+	def __init__(self):
+		self.course_to_id = {}
+		self.id_to_course = []
+		self.succ = []  # succ[v]: courses that have v as a prerequisite
+		self.pred = []  # pred[v]: prerequisites of v
+		self.ord = []   # ord[v]: position of v in the order
+		self.pos = []   # pos[i]: course at position i
+
+	@classmethod
+	def from_graph(cls, graph, id_to_course):
+		"""
+		Builds the incremental schedule of a graph in adjacency list format (see generate_graph)
+
+		:return: Incremental schedule of the graph
+		:rtype: IncrementalSchedule
+		"""
+		order = schedule(graph)
+		if len(order)!=len(graph):
+			raise ValueError("No valid schedule found")
+		inc = cls()
+		ids = [0] * len(graph)
+		for v in order:
+			ids[v] = inc.add_course(id_to_course[v])
+		# The order already respects every prerequisite, so the edges are added directly
+		for v in range(len(graph)):
+			for prereq in graph[v]:
+				inc.succ[ids[prereq]].add(ids[v])
+				inc.pred[ids[v]].add(ids[prereq])
+		return inc
+
+	def _id(self, course):
+		"""
+		Helper method returning the ID of a course, raising an error for unknown courses
+
+		:return: Numeric ID of the course
+		:rtype: int
+		"""
+		if course not in self.course_to_id:
+			raise ValueError("Unknown course "+str(course))
+		return self.course_to_id[course]
+
+	def add_course(self, course):
+		"""
+		Adds a course without prerequisites at the end of the order (no-op if already present)
+
+		:return: Numeric ID of the course
+		:rtype: int
+		"""
+		if course in self.course_to_id:
+			return self.course_to_id[course]
+		v = len(self.id_to_course)
+		self.course_to_id[course] = v
+		self.id_to_course.append(course)
+		self.succ.append(set())
+		self.pred.append(set())
+		self.ord.append(len(self.pos))
+		self.pos.append(v)
+		return v
+
+	def add_prerequisite(self, course, prereq):
+		"""
+		Makes prereq a prerequisite of course, repairing the order locally if needed
+
+		Raises an error, leaving the schedule unchanged, if the new prerequisite closes a cycle
+
+		:return: None
+		:rtype: None
+		"""
+		y, x = self._id(course), self._id(prereq)
+		if x==y:
+			raise ValueError("The course "+str(course)+" cannot be a prerequisite to itself")
+		if y in self.succ[x]:
+			return
+		lb, ub = self.ord[y], self.ord[x]
+		if lb<ub:
+			# x comes after y: find what has to move, within the affected region [lb, ub]
+			forward = self._reach(y, self.succ, lambda w: self.ord[w]<=ub, x)
+			if forward is None:
+				raise ValueError("Adding "+str(prereq)+" as a prerequisite of "+str(course)+" creates a cycle")
+			backward = self._reach(x, self.pred, lambda w: self.ord[w]>=lb, None)
+			self._reorder(backward, forward)
+		self.succ[x].add(y)
+		self.pred[y].add(x)
+
+	def remove_prerequisite(self, course, prereq):
+		"""
+		Removes prereq from the prerequisites of course; the current order stays valid
+
+		:return: None
+		:rtype: None
+		"""
+		y, x = self._id(course), self._id(prereq)
+		self.succ[x].discard(y)
+		self.pred[y].discard(x)
+
+	def _reach(self, start, edges, inside, target):
+		"""
+		Helper method listing the courses reachable from start through edges while inside holds
+		Iterative depth-first search, so deep graphs do not hit the recursion limit
+
+		:return: Reached courses, or None if target was reached
+		:rtype: List[int]
+		"""
+		seen = {start}
+		stack = [start]
+		while stack:
+			v = stack.pop()
+			for w in edges[v]:
+				if w==target:
+					return None
+				if w not in seen and inside(w):
+					seen.add(w)
+					stack.append(w)
+		return list(seen)
+
+	def _reorder(self, backward, forward):
+		"""
+		Helper method moving the courses that reach x (backward) before those reached from y
+		(forward), reusing the positions they occupied between them
+
+		:return: None
+		:rtype: None
+		"""
+		backward.sort(key=self.ord.__getitem__)
+		forward.sort(key=self.ord.__getitem__)
+		moved = backward+forward
+		slots = sorted(self.ord[v] for v in moved)
+		for v, i in zip(moved, slots):
+			self.ord[v] = i
+			self.pos[i] = v
+
+	def order(self):
+		"""
+		Current order of courses to be taken
+
+		:return: Course names, every course after all of its prerequisites
+		:rtype: List[str]
+		"""
+		return [self.id_to_course[v] for v in self.pos]
+
 def generate_graph(data, course_to_id):
 	"""
 	Method to read the JSON and build the directed graph of courses (= DAG of course IDs)
@@ -139,7 +303,654 @@ def validate_json(data):
 			err_print("Error: Conflicting prerequisites input for "+obj["name"])
 			sys.exit(0)
 
-def main():
+# Number of characters read from the input file at a time by iter_courses
+READ_CHUNK = 1<<16
+
+def _skip_whitespace(f, buf, pos):
+	"""
+	Helper function to skip whitespace in a buffer of JSON text, reading more of f as needed
+
+	:return: Buffer and position of the next non-whitespace character
+	:rtype: Tuple[str, int]
+	"""
+	while True:
+		while pos<len(buf) and buf[pos] in ' \t\r\n':
+			pos += 1
+		if pos<len(buf):
+			return buf, pos
+		buf = f.read(READ_CHUNK)
+		pos = 0
+		if not buf:
+			raise ValueError("Unexpected end of JSON input")
+
+def iter_courses(f):
+	"""
+	Method to read the course objects of a JSON file one at a time
+
+	Accepts either a JSON array of objects, decoded incrementally so that only a small window of the
+	text is held in memory, or JSON Lines (one object per line)
+	Raises ValueError on malformed input
+
+	:return: Generator of course objects
+	:rtype: Iterator[Dict]
+	"""
+	buf, pos = _skip_whitespace(f, f.read(READ_CHUNK), 0)
+	if buf[pos]!='[':
+		# JSON Lines: complete the last, partial line of the buffer and continue with the file
+		lines = buf[pos:].split('\n')
+		lines[-1] += f.readline()
+		for line in itertools.chain(lines, f):
+			if line.strip():
+				yield json.loads(line)
+		return
+
+	decoder = json.JSONDecoder()
+	buf, pos = _skip_whitespace(f, buf, pos+1)
+	if buf[pos]==']':
+		return
+	while True:
+		# Decode the next object, reading more text while it is incomplete
+		while True:
+			try:
+				obj, pos = decoder.raw_decode(buf, pos)
+				break
+			except ValueError:
+				chunk = f.read(READ_CHUNK)
+				if not chunk:
+					raise
+				buf = buf[pos:] + chunk
+				pos = 0
+		yield obj
+
+		buf, pos = _skip_whitespace(f, buf, pos)
+		if buf[pos]==']':
+			return
+		if buf[pos]!=',':
+			raise ValueError("Expected ',' or ']' in JSON array")
+		buf, pos = _skip_whitespace(f, buf, pos+1)
+
+def load_catalog(f):
+	"""
+	Method to read, validate and convert a course catalog in a single streaming pass
+
+	Performs the checks of validate_json and map_course_to_id while reading the objects one at a
+	time (see iter_courses), interns the course names, and builds the graph in compressed sparse
+	row (CSR) format: the prerequisites of course i are targets[offsets[i]:offsets[i+1]]
+	Course IDs follow the order of declaration, as in map_course_to_id
+	If error is found, program exits
+
+	:return: The course names by ID, and the offsets and targets arrays of the graph
+	:rtype: Tuple[List[str], array, array]
+	"""
+	course_to_id = {}         # provisional IDs, in order of first appearance
+	names = []                # course names by provisional ID
+	declared = array('i')     # declared[provisional ID] = ID (order of declaration), or -1
+	order = array('i')        # provisional IDs in order of declaration
+	offsets = array('i', [0])
+	prereqs = array('i')      # prerequisites (provisional IDs), grouped by course in order of declaration
+
+	def get_id(name):
+		if name not in course_to_id:
+			course_to_id[name] = len(names)
+			names.append(name)
+			declared.append(-1)
+		return course_to_id[name]
+
+	ctr = -1
+	for obj in iter_courses(f):
+		ctr += 1
+
+		# Check for presence of 'name' and 'prerequisites' keys
+		if not isinstance(obj, dict) or ("name" not in obj and "prerequisites" not in obj):
+			err_print("Error: \'name\' and \'prerequisites\' keys not found in JSON object "+str(ctr))
+			sys.exit(0)
+		if "name" not in obj:
+			err_print("Error: \'name\' key not found in JSON object "+str(ctr))
+			sys.exit(0)
+		if "prerequisites" not in obj:
+			err_print("Error: \'prerequisites\' key not found in JSON object "+str(ctr))
+			sys.exit(0)
+
+		name = sys.intern(obj["name"].strip())
+		required = [get_id(sys.intern(prereq.strip())) for prereq in obj["prerequisites"]]
+		v = get_id(name)
+
+		# Check for self-prerequisites and conflicting prerequisites inputs
+		if v in required:
+			err_print("Error: The course "+name+" cannot be a prerequisite to itself")
+			sys.exit(0)
+		if declared[v]!=-1:
+			d = declared[v]
+			if set(prereqs[offsets[d]:offsets[d+1]])!=set(required):
+				err_print("Error: Conflicting prerequisites input for "+name)
+				sys.exit(0)
+			# Duplicate object
+			continue
+
+		declared[v] = len(order)
+		order.append(v)
+		prereqs.extend(required)
+		offsets.append(len(prereqs))
+
+	if ctr==-1:
+		err_print("Error: No data present")
+		sys.exit(0)
+
+	for v in range(len(names)):
+		if declared[v]==-1:
+			# Unknown, undeclared course encountered in prerequisites
+			err_print("Error: Prerequisites requirement (if any) of course "+names[v]+" is not mentioned")
+			sys.exit(0)
+
+	# Remap the prerequisites to IDs in place, without a temporary list of the edges
+	for j in range(len(prereqs)):
+		prereqs[j] = declared[prereqs[j]]
+	return [names[v] for v in order], offsets, prereqs
+
+def _reverse_csr(offsets, targets):
+	"""
+	Helper function to reverse the edges of a graph in CSR format: for every course v, the courses
+	requiring v become dependents[first[v]:first[v+1]]
+
+	:return: The first and dependents arrays
+	:rtype: Tuple[array, array]
+	"""
+	numCourses = len(offsets)-1
+	first = array('i', [0]) * (numCourses+1)
+	for prereq in targets:
+		first[prereq+1] += 1
+	for i in range(numCourses):
+		first[i+1] += first[i]
+	fill = array('i', first)
+	dependents = array('i', [0]) * len(targets)
+	for i in range(numCourses):
+		for j in range(offsets[i], offsets[i+1]):
+			prereq = targets[j]
+			dependents[fill[prereq]] = i
+			fill[prereq] += 1
+	return first, dependents
+
+def schedule_csr(offsets, targets):
+	"""
+	Method to perform topological sorting of a graph in CSR format (see load_catalog)
+	Same algorithm as schedule, run over flat arrays instead of lists of lists (see CourseGraph)
+	Complexity: O(V+E) time and O(V+E) space
+
+	:return: The correct order of courses to be taken or null list if no valid order found
+	:rtype: List[int]
+	"""
+	return CourseGraph(None, offsets, targets).schedule()
+
+# Kahn frontiers of at least this many courses are processed with NumPy by CourseGraph, if available
+WIDE_FRONTIER = 1024
+
+class CourseGraph(object):
+	"""
+	Compact course graph
+
+	The prerequisites and their reverse (the courses requiring each course) are held as flat int32
+	CSR arrays, 8 bytes per prerequisite edge instead of about three Python objects in lists of lists
+	The graph can be saved to a binary file and loaded back through mmap, so repeated scheduling
+	runs over the same catalog skip parsing and validation entirely
+
+	File layout (little-endian): header (magic, number of courses V, number of edges E), then the
+	int32 arrays offsets (V+1), targets (E), first (V+1), dependents (E) and name_offsets (V+1), and
+	finally the UTF-8 course names back to back
+	"""
+
+	MAGIC = b'COURSEGR'
+	# Magic bytes, number of courses and number of prerequisite edges
+	HEADER = struct.Struct('<8sQQ')
+
+	def __init__(self, names, offsets, targets, first=None, dependents=None):
+		self.names = names            # names[v]: name of course v
+		self.offsets = offsets        # prerequisites of v: targets[offsets[v]:offsets[v+1]]
+		self.targets = targets
+		if first is None:
+			first, dependents = _reverse_csr(offsets, targets)
+		self.first = first            # courses requiring v: dependents[first[v]:first[v+1]]
+		self.dependents = dependents
+		self._map = None
+		self._views = []
+
+	@classmethod
+	def from_graph(cls, graph, id_to_course):
+		"""
+		Builds the compact graph of a graph in adjacency list format (see generate_graph)
+
+		:return: Compact course graph
+		:rtype: CourseGraph
+		"""
+		offsets = array('i', [0])
+		targets = array('i')
+		for prereqs in graph:
+			targets.extend(prereqs)
+			offsets.append(len(targets))
+		return cls(list(id_to_course), offsets, targets)
+
+	def __len__(self):
+		return len(self.offsets)-1
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def close(self):
+		"""
+		Releases the mapping of a loaded graph (its arrays must not be used afterwards)
+
+		:return: None
+		:rtype: None
+		"""
+		if self._map is not None:
+			self.offsets = self.targets = self.first = self.dependents = None
+			for view in reversed(self._views):
+				view.release()
+			self._views = []
+			self._map.close()
+			self._map = None
+
+	def outdegree(self):
+		"""
+		Number of prerequisites of every course
+
+		:return: Prerequisite counts by course ID
+		:rtype: array
+		"""
+		offsets = self.offsets
+		return array('i', [offsets[i+1]-offsets[i] for i in range(len(self))])
+
+	def schedule(self):
+		"""
+		Method to perform topological sorting of the graph (Kahn's algorithm, as in schedule)
+		The queue is taken one frontier at a time (see _levels), which gives the same order
+		Complexity: O(V+E) time and O(V) extra space
+
+		:return: The correct order of courses to be taken or null list if no valid order found
+		:rtype: List[int]
+		"""
+		levels = self._levels()
+		if levels is None:
+			return []
+		return [v for frontier in levels for v in frontier]
+
+	def _numpy_arrays(self):
+		"""
+		Helper method returning NumPy views of the first and dependents arrays
+
+		:return: first and dependents arrays
+		:rtype: Tuple[numpy.ndarray, numpy.ndarray]
+		"""
+		first = np.frombuffer(self.first, dtype=np.int32).astype(np.int64)
+		dependents = np.frombuffer(self.dependents, dtype=np.int32)
+		return first, dependents
+
+	@staticmethod
+	def _gather(first, dependents, frontier):
+		"""
+		Helper method concatenating the dependents of every course of a frontier, in frontier order
+
+		:return: Dependents, and the number of dependents of every course of the frontier
+		:rtype: Tuple[numpy.ndarray, numpy.ndarray]
+		"""
+		starts = first[frontier]
+		lengths = first[frontier+1]-starts
+		total = int(lengths.sum())
+		idx = np.arange(total) - np.repeat(np.cumsum(lengths)-lengths, lengths) + np.repeat(starts, lengths)
+		return dependents[idx], lengths
+
+	def _levels(self):
+		"""
+		Helper method running Kahn's algorithm one frontier at a time
+
+		The queue takes the courses of a frontier in order, and a course joins the queue when its last
+		prerequisite is taken; so the next frontier is made of the courses whose count drops to zero,
+		in the order of the last time they appear among the dependents of the frontier
+		Frontier k holds exactly the courses whose longest chain of prerequisites has k courses
+		Frontiers of at least WIDE_FRONTIER courses are processed at once with NumPy, if available;
+		narrower ones, where the array calls would cost more than they save, by the Python loop
+
+		:return: The frontiers, or None if no valid order found
+		:rtype: List[List[int]]
+		"""
+		numCourses = len(self)
+		first, dependents = self.first, self.dependents
+		outdegree = self.outdegree()
+		if np is not None:
+			npfirst, npdependents = self._numpy_arrays()
+			# Shares its memory with outdegree
+			npoutdegree = np.frombuffer(outdegree, dtype=np.int32)
+
+		frontier = [i for i in range(numCourses) if outdegree[i]==0]
+		levels = []
+		done = 0
+		while frontier:
+			levels.append(frontier)
+			done += len(frontier)
+			if np is None or len(frontier)<WIDE_FRONTIER:
+				unlocked = []
+				for v in frontier:
+					for u in dependents[first[v]:first[v+1]]:
+						outdegree[u] -= 1
+						if outdegree[u]==0:
+							unlocked.append(u)
+				frontier = unlocked
+				continue
+
+			unlocked, _ = self._gather(npfirst, npdependents, np.array(frontier, dtype=np.int64))
+			# Position of the last occurrence of every dependent, and those now free of prerequisites
+			# (only the dependents are touched, so deep graphs do not pay O(V) per frontier)
+			uniq, last, counts = np.unique(unlocked[::-1], return_index=True, return_counts=True)
+			npoutdegree[uniq] -= counts.astype(np.int32)
+			ready = npoutdegree[uniq]==0
+			uniq, last = uniq[ready], len(unlocked)-1-last[ready]
+			frontier = uniq[np.argsort(last)].tolist()
+
+		if done!=numCourses:
+			return None
+		return levels
+
+	def _depths(self):
+		"""
+		Helper method computing the depth (longest chain of prerequisites ending with the course) and
+		the height (longest chain of courses depending on it) of every course
+
+		:return: The courses grouped by depth, and the heights, or None if no valid order found
+		:rtype: Tuple[List[List[int]], List[int]]
+		"""
+		numCourses = len(self)
+		levels = self._levels()
+		if levels is None:
+			return None
+		first, dependents = self.first, self.dependents
+		height = array('i', [1]) * numCourses
+		if np is not None:
+			npfirst, npdependents = self._numpy_arrays()
+			# Shares its memory with height
+			npheight = np.frombuffer(height, dtype=np.int32)
+
+		# Same split as in _levels: wide frontiers at once with NumPy, narrow ones by the Python loop
+		for frontier in reversed(levels):
+			if np is None or len(frontier)<WIDE_FRONTIER:
+				for v in frontier:
+					h = 0
+					for u in dependents[first[v]:first[v+1]]:
+						if height[u]>h:
+							h = height[u]
+					height[v] = h+1
+				continue
+
+			frontier = np.array(frontier, dtype=np.int64)
+			unlocked, lengths = self._gather(npfirst, npdependents, frontier)
+			if len(unlocked):
+				np.maximum.at(npheight, np.repeat(frontier, lengths), npheight[unlocked]+1)
+		return levels, height
+
+	def schedule_levels(self, max_per_term=None):
+		"""
+		Method to pack the courses into terms, every course in a later term than all of its prerequisites
+
+		The depth of a course (longest chain of prerequisites ending with it) is the earliest term it
+		can be taken in, and without a load limit the courses are simply grouped by depth
+		With a limit of max_per_term courses, a list scheduler fills each term with the available
+		courses of greatest height (longest chain of courses depending on them), critical path first;
+		it is not always optimal, so the number of terms can exceed the lower bound
+		Complexity: O(V+E) time without a limit, O(V log V + E) time with one, and O(V) extra space
+
+		:return: The courses of every term, and a lower bound on the number of terms (the length of
+			the critical path, or the number of courses divided by the limit if larger), or null list
+			and 0 if no valid order found
+		:rtype: Tuple[List[List[int]], int]
+		"""
+		numCourses = len(self)
+		res = self._depths() if numCourses else None
+		if res is None:
+			return [], 0
+		levels, height = res
+		critical = len(levels)
+
+		if max_per_term is None or max_per_term<=0 or max_per_term>=numCourses:
+			return levels, critical
+		lower_bound = max(critical, -(-numCourses//max_per_term))
+
+		# Priorities packed in a single int, greatest height first and then lowest course ID
+		ready = [(critical-height[v])*numCourses+v for v in levels[0]]
+		heapq.heapify(ready)
+		terms = []
+
+		first, dependents = self.first, self.dependents
+		outdegree = self.outdegree()
+		while ready:
+			term = [heapq.heappop(ready)%numCourses for _ in range(min(max_per_term, len(ready)))]
+			terms.append(term)
+			# Courses unlocked by this term can only be taken from the next one
+			for v in term:
+				for u in dependents[first[v]:first[v+1]]:
+					outdegree[u] -= 1
+					if outdegree[u]==0:
+						heapq.heappush(ready, (critical-height[u])*numCourses+u)
+
+		return terms, lower_bound
+
+	def strongly_connected_components(self):
+		"""
+		Method to find the strongly connected components of the graph (iterative Tarjan's algorithm)
+
+		Every component with more than one course is a group of courses requiring each other; the
+		components come out prerequisites first, so they also form a valid schedule of the condensed
+		graph where every group is taken as a unit
+		Algorithm: https://en.wikipedia.org/wiki/Tarjan%27s_strongly_connected_components_algorithm
+		Complexity: O(V+E) time and O(V) extra space, with no recursion
+
+		:return: The components, in schedule order
+		:rtype: List[List[int]]
+		"""
+		numCourses = len(self)
+		offsets, targets = self.offsets, self.targets
+		index = array('i', [-1]) * numCourses
+		low = array('i', [0]) * numCourses
+		onstack = bytearray(numCourses)
+		stack = []
+		components = []
+		ctr = 0
+
+		for root in range(numCourses):
+			if index[root]!=-1:
+				continue
+			index[root] = low[root] = ctr
+			ctr += 1
+			stack.append(root)
+			onstack[root] = 1
+			# Depth first search with an explicit stack of (course, next prerequisite edge)
+			path = [root]
+			edge = [offsets[root]]
+			while path:
+				v = path[-1]
+				i = edge[-1]
+				if i<offsets[v+1]:
+					edge[-1] = i+1
+					w = targets[i]
+					if index[w]==-1:
+						index[w] = low[w] = ctr
+						ctr += 1
+						stack.append(w)
+						onstack[w] = 1
+						path.append(w)
+						edge.append(offsets[w])
+					elif onstack[w] and index[w]<low[v]:
+						low[v] = index[w]
+					continue
+
+				path.pop()
+				edge.pop()
+				if path and low[v]<low[path[-1]]:
+					low[path[-1]] = low[v]
+				if low[v]==index[v]:
+					# v is the root of a component: pop it off the stack
+					component = []
+					while True:
+						w = stack.pop()
+						onstack[w] = 0
+						component.append(w)
+						if w==v:
+							break
+					component.reverse()
+					components.append(component)
+
+		return components
+
+	def witness_cycle(self, component):
+		"""
+		Method to find a shortest cycle through the first course of a strongly connected component
+		(breadth first search over the courses requiring it, inside the component)
+
+		:return: The courses of the cycle, each one a prerequisite of the next and the last one a
+			prerequisite of the first, or null list for a single course
+		:rtype: List[int]
+		"""
+		if len(component)<2:
+			return []
+		first, dependents = self.first, self.dependents
+		inside = set(component)
+		start = component[0]
+		parent = {start: start}
+		queue = [start]
+		for v in queue:
+			for u in dependents[first[v]:first[v+1]]:
+				if u==start:
+					cycle = [v]
+					while v!=start:
+						v = parent[v]
+						cycle.append(v)
+					cycle.reverse()
+					return cycle
+				if u in inside and u not in parent:
+					parent[u] = v
+					queue.append(u)
+		return []
+
+	def cycles(self):
+		"""
+		Method to find every group of courses requiring each other, with a cycle as a witness
+
+		:return: The cyclic components, each with a shortest cycle through its first course
+		:rtype: List[Tuple[List[int], List[int]]]
+		"""
+		return [(component, self.witness_cycle(component))
+			for component in self.strongly_connected_components() if len(component)>1]
+
+	def save(self, path):
+		"""
+		Writes the graph to a binary file (see the class documentation for the layout)
+
+		:return: None
+		:rtype: None
+		"""
+		encoded = [name.encode('utf-8') for name in self.names]
+		name_offsets = array('i', [0])
+		for name in encoded:
+			name_offsets.append(name_offsets[-1]+len(name))
+
+		with open(path, 'wb') as f:
+			f.write(self.HEADER.pack(self.MAGIC, len(self), len(self.targets)))
+			for arr in (self.offsets, self.targets, self.first, self.dependents, name_offsets):
+				arr = array('i', arr)
+				if sys.byteorder=='big':
+					arr.byteswap()
+				arr.tofile(f)
+			f.write(b''.join(encoded))
+
+	@classmethod
+	def is_saved_graph(cls, path):
+		"""
+		Checks whether a file holds a graph written by save
+
+		:return: True if the file starts with the magic bytes, False otherwise
+		:rtype: bool
+		"""
+		with open(path, 'rb') as f:
+			return f.read(len(cls.MAGIC))==cls.MAGIC
+
+	@classmethod
+	def load(cls, path):
+		"""
+		Loads a graph written by save
+
+		The file is mapped read-only and the arrays are views of the mapping (on little-endian
+		machines), so only the course names are decoded
+
+		:return: Compact course graph
+		:rtype: CourseGraph
+		"""
+		with open(path, 'rb') as f:
+			mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		magic, numCourses, numEdges = cls.HEADER.unpack_from(mm)
+		if magic!=cls.MAGIC:
+			mm.close()
+			raise ValueError("Not a course graph file: "+str(path))
+
+		views = [memoryview(mm)]
+		pos = cls.HEADER.size
+		arrays = []
+		for size in (numCourses+1, numEdges, numCourses+1, numEdges, numCourses+1):
+			part = views[0][pos:pos+4*size]
+			if sys.byteorder=='big':
+				arr = array('i', part.tobytes())
+				arr.byteswap()
+				part.release()
+			else:
+				arr = part.cast('i')
+				views += [part, arr]
+			arrays.append(arr)
+			pos += 4*size
+		offsets, targets, first, dependents, name_offsets = arrays
+
+		blob = mm[pos:]
+		names = [blob[name_offsets[i]:name_offsets[i+1]].decode('utf-8') for i in range(numCourses)]
+		graph = cls(names, offsets, targets, first, dependents)
+		graph._map = mm
+		graph._views = views
+		return graph
+
+def schedule_levels(graph, max_per_term=None):
+	"""
+	Method to pack the courses of the input graph (in adjacency list format) into terms of at most
+	max_per_term courses (see CourseGraph.schedule_levels)
+
+	:return: The courses of every term, and a lower bound on the number of terms
+	:rtype: Tuple[List[List[int]], int]
+	"""
+	if not isinstance(graph, CourseGraph):
+		graph = CourseGraph.from_graph(graph, [None] * len(graph))
+	return graph.schedule_levels(max_per_term)
+
+def find_cycles(graph):
+	"""
+	Method to find the groups of courses of the input graph (in adjacency list format) that require
+	each other (see CourseGraph.cycles)
+
+	:return: The cyclic components, each with a shortest cycle through its first course
+	:rtype: List[Tuple[List[int], List[int]]]
+	"""
+	if not isinstance(graph, CourseGraph):
+		graph = CourseGraph.from_graph(graph, [None] * len(graph))
+	return graph.cycles()
+
+def schedule_condensed(graph):
+	"""
+	Method to schedule the input graph (in adjacency list format) with every group of courses
+	requiring each other taken as a unit (see CourseGraph.strongly_connected_components)
+
+	:return: The groups of courses in a valid order (single courses are groups of one)
+	:rtype: List[List[int]]
+	"""
+	if not isinstance(graph, CourseGraph):
+		graph = CourseGraph.from_graph(graph, [None] * len(graph))
+	return graph.strongly_connected_components()
+
+def main(argv=None):
 	"""
 	Main method
 
@@ -147,51 +958,79 @@ def main():
 	Algorithm output is printed to stdout
 	Sample input file: data/course_scheduler_input1.json
 	Each course has a list of prerequisites (may be empty)
+	If no valid order exists, the groups of courses requiring each other are reported with a cycle each
+	The input may also be a graph written with --save, which is loaded without any parsing
 
 	:return: None
 	:rtype: None
 	"""
+	parser = argparse.ArgumentParser(description="Schedule courses taking into account prerequisites")
+	parser.add_argument('input_file', nargs='?', help="course catalog (JSON array or JSON Lines) or saved graph")
+	parser.add_argument('--save', metavar='PATH', help="also save the graph to this binary file for later runs")
+	parser.add_argument('--max-per-term', type=int, metavar='K',
+		help="print a term by term plan with at most K courses per term (0 for no limit)")
+	parser.add_argument('--condense', action='store_true',
+		help="print an order even with cyclic prerequisites, taking each group of courses requiring each other as a unit")
+	args = parser.parse_args(argv)
 
 	# Check validity of number of arguments
-	if len(sys.argv)<2:
+	if args.input_file is None:
 		err_print("Error: No arguments provided")
 		sys.exit(0)
 
-	# Take the first and only argument as the input file
-	input_file = sys.argv[1] 
+	input_file = args.input_file
 
-	# Attempt to read the file
-	with open(input_file) as f:
-		try:
-			data = json.load(f)
-		except ValueError:
-			# Print issue with malformed JSON input
-			err_print("Error: Issue with input file")
-			sys.exit(0)
+	if CourseGraph.is_saved_graph(input_file):
+		graph = CourseGraph.load(input_file)
+	else:
+		# Attempt to read, validate and convert the file in a single pass
+		# Both a JSON array and JSON Lines (one object per line) are accepted
+		with open(input_file) as f:
+			try:
+				id_to_course, offsets, targets = load_catalog(f)
+			except ValueError:
+				# Print issue with malformed JSON input
+				err_print("Error: Issue with input file")
+				sys.exit(0)
+		graph = CourseGraph(id_to_course, offsets, targets)
+
+	if args.save:
+		graph.save(args.save)
 
-	# Validate input JSON file & delete duplicate objects
-	validate_json(data)
-	data = {d['name'] : d for d in data}.values()
-	
-	# Parse the text data into a more suitable numeric format
-	course_to_id = map_course_to_id(data) # Mapping courses to IDs
-	id_to_course = {v: k for k, v in course_to_id.items()} # Mapping the IDs to courses
-	
-	# Generate the graph of prerequisites and courses
-	graph = generate_graph(data, course_to_id)
-	
 	# Run the scheduler algorithm
-	answer = schedule(graph)
-	
-	if len(answer)>0:
+	with graph:
+		id_to_course = graph.names
+		if args.condense:
+			groups = graph.strongly_connected_components()
+			print("Order: "+" -> ".join(id_to_course[group[0]] if len(group)==1 else
+				"["+", ".join(id_to_course[course] for course in group)+"]" for group in groups))
+			return
+
+		if args.max_per_term is not None:
+			terms, lower_bound = graph.schedule_levels(args.max_per_term)
+			answer = [course for term in terms for course in term]
+		else:
+			answer = graph.schedule()
+
+		if len(answer)==0:
+			# No valid order exists: report every group of courses requiring each other
+			err_print("Error: No valid schedule found")
+			for component, cycle in graph.cycles():
+				err_print("Error: Cyclic prerequisites among "+str(len(component))+" courses: "+
+					", ".join(id_to_course[course] for course in component))
+				err_print("  Cycle: "+" -> ".join(id_to_course[course] for course in cycle+cycle[:1]))
+			return
+
+	if args.max_per_term is not None:
+		for i, term in enumerate(terms):
+			print("Term "+str(i+1)+": "+", ".join(id_to_course[course] for course in term))
+		print("Terms: "+str(len(terms))+" (lower bound "+str(lower_bound)+")")
+	else:
 		# Valid order exists
 		print("Order: ", end='')
 		for course in answer[:-1]:
 			print(id_to_course[course], end=' -> ')
 		print(id_to_course[answer[-1]])
-	else:
-		# No valid order exists
-		err_print("Error: No valid schedule found")
 
 
 if __name__ == '__main__':
@@ -2,7 +2,7 @@
 """
 coding=utf-8
 
-Python 3.5.2
+Python 3.9+
 
 Credit card numbers generator
 Useful demo of what this code aims to do: https://developer.paypal.com/developer/creditCardGenerator/
@@ -14,99 +14,416 @@ Warning(s):
 """
 
 # Imports
+import os
 import sys
+import math
 import random
+import struct
+import hashlib
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
 
-def luhn_check_generator_10(N):
+# Shared Luhn kernels (luhn_check_generator_10 is re-exported from here)
+from luhn import luhn_check_generator_10, check_digits
+
+# Visa, Mastercard, Amex, Discover, Maestro, JCB, Diners International, Diners US & Canada, RuPay, MIR
+
+# Prefixes for the card networks, as inclusive ranges of prefixes with the same number of digits
+# Retrived from https://en.wikipedia.org/wiki/Payment_card_number
+NETWORKS = {}
+NETWORKS['Visa'] = [(4, 4)]
+NETWORKS['Mastercard'] = [(51, 55), (222100, 272099)]
+NETWORKS['American Express'] = [(34, 34), (37, 37)]
+NETWORKS['Discover'] = [(6011, 6011), (64, 65)]
+NETWORKS['Maestro'] = [(50, 50), (56, 58), (639, 639), (67, 67)]
+NETWORKS['JCB'] = [(3528, 3589)]
+NETWORKS['Diners Club International'] = [(36, 36), (300, 305), (3095, 3095), (38, 39)]
+NETWORKS['Diners Club US & Canada'] = [(54, 55)] # 55 is co-branded with Mastercard
+NETWORKS['RuPay'] = [(60, 60), (6521, 6522)]
+NETWORKS['MIR'] = [(2200, 2204)]
+
+# Rough share of each network among cards in circulation, for realistic-looking test data
+MARKET_SHARE = {
+	'Visa': 40,
+	'Mastercard': 30,
+	'American Express': 6,
+	'Discover': 3,
+	'Maestro': 5,
+	'JCB': 3,
+	'Diners Club International': 1,
+	'Diners Club US & Canada': 1,
+	'RuPay': 7,
+	'MIR': 4,
+}
+
+def alias_table(weights):
+	"""
+	Builds an alias table for sampling indices in proportion to weights in O(1) per draw
+	Algorithm: Vose's alias method (https://www.keithschwarz.com/darts-dice-coins/)
+
+	:return: Acceptance probabilities and alias indices
+	:rtype: Tuple[List[float], List[int]]
+	"""
+	n = len(weights)
+	total = float(sum(weights))
+	prob = [w*n/total for w in weights]
+	alias = list(range(n))
+	small = [i for i in range(n) if prob[i]<1]
+	large = [i for i in range(n) if prob[i]>=1]
+	while small and large:
+		s = small.pop()
+		l = large.pop()
+		alias[s] = l
+		prob[l] += prob[s]-1
+		if prob[l]<1:
+			small.append(l)
+		else:
+			large.append(l)
+	# Leftovers are only off 1 by rounding errors
+	for i in small+large:
+		prob[i] = 1.0
+	return prob, alias
+
+def alias_draw(table, uniform):
+	"""
+	Draws an index from an alias table, using a single call to uniform (e.g. random.random)
+
+	:return: Sampled index
+	:rtype: int
+	"""
+	prob, alias = table
+	x = uniform()*len(prob)
+	i = int(x)
+	return i if x-i<prob[i] else alias[i]
+
+# Per network alias tables picking a prefix range in proportion to its number of prefixes,
+# so that every prefix of a network is equally likely
+_PREFIX_TABLES = {name: alias_table([hi-lo+1 for lo, hi in ranges]) for name, ranges in NETWORKS.items()}
+
+def random_prefix(network, uniform):
 	"""
-	Luhn mod 10 check digit generator
+	Picks a prefix of a network uniformly at random in O(1), without expanding its ranges
 
-	Generates the check digit of a numeric sequence using the Luhn Algorithm
+	:return: Prefix digits
+	:rtype: str
+	"""
+	ranges = NETWORKS[network]
+	lo, hi = ranges[alias_draw(_PREFIX_TABLES[network], uniform)] if len(ranges)>1 else ranges[0]
+	if lo==hi:
+		return str(lo)
+	return str(lo + int(uniform()*(hi-lo+1)))
 
-	:return: Generated check digit
+def card_length(network):
+	"""
+	Length of the card numbers of a network, check digit included
+
+	:return: Number of digits
 	:rtype: int
 	"""
-	# Digital sum of numbers
-	digital = {0: 0, 2: 2, 4: 4, 6: 6, 8: 8, 10: 1, 12: 3, 14: 5, 16: 7, 18: 9}
+	if network=='American Express':
+		return 15 # Amex has 15 length CC numbers
+	return 16
+
+# Maps random bytes to ASCII digits; bytes 250-255 are dropped so that every digit is equally likely
+_BYTE_TO_DIGIT = bytes(48 + i%10 for i in range(256))
+_BIASED_BYTES = bytes(range(250, 256))
+
+# Number of cards generated and written per batch
+BATCH_CARDS = 1<<14
 
-	# Storing the sum
-	s = 0
-	for i in range(len(N)):
-		if i&1:
-			# Double the odd index numbers, 0-index notation
-			s += digital[int(N[i])*2]
+# Record layout of the binary output format: card number and index of the network in NETWORKS
+CARD_RECORD = struct.Struct('<QB')
+
+def _random_digits(rng, count):
+	"""
+	Helper function to draw count uniformly random decimal digits
+
+	Random bytes are drawn in one block and turned into digits by bytes.translate, dropping the
+	few bytes that would bias the digits, and topped up in the rare case too many were dropped
+
+	:return: ASCII digits
+	:rtype: bytes
+	"""
+	digits = b''
+	while len(digits)<count:
+		need = count-len(digits)
+		digits += rng.randbytes(need + need//32 + 8).translate(_BYTE_TO_DIGIT, _BIASED_BYTES)
+	return digits[:count]
+
+def generate_cards(n, networks=None, seed=None):
+	"""
+	Bulk credit card numbers generator
+
+	Generates n random Luhn-valid card numbers, each with a prefix chosen uniformly among its network's prefixes
+	networks is either a list of network names, chosen uniformly (default: all of NETWORKS), or a
+	dict of network names to weights, such as MARKET_SHARE; networks are drawn from an alias table
+	The random digits of a whole batch are drawn in a few large blocks and the check digits are
+	computed per batch; the same seed and n always give the same cards
+
+	:return: Generator of (card number, network) pairs
+	:rtype: Iterator[Tuple[str, str]]
+	"""
+	rng = random.Random(seed)
+	uniform = rng.random
+	networks = networks or list(NETWORKS)
+	weights = list(networks.values()) if isinstance(networks, dict) else [1]*len(networks)
+	networks = list(networks)
+	table = alias_table(weights)
+	while n>0:
+		size = min(n, BATCH_CARDS)
+		n -= size
+		chosen = [networks[alias_draw(table, uniform)] for _ in range(size)]
+		prefixes = [random_prefix(c, uniform).encode('ascii') for c in chosen]
+		lengths = [card_length(c)-len(p)-1 for c, p in zip(chosen, prefixes)]
+
+		digits = _random_digits(rng, sum(lengths))
+		ends = itertools.accumulate(lengths)
+		payloads = [p + digits[e-k:e] for p, k, e in zip(prefixes, lengths, ends)]
+		checks = check_digits(payloads)
+
+		for p, c, network in zip(payloads, checks, chosen):
+			yield (p + bytes((c,))).decode('ascii'), network
+
+def write_cards(cards, f, fmt='text'):
+	"""
+	Writes (card number, network) pairs to a binary file object in batches
+
+	text: the number padded to 16 characters and the network in parentheses
+	csv: number,network lines
+	binary: CARD_RECORD records (little-endian uint64 number, uint8 network index)
+
+	:return: Number of cards written
+	:rtype: int
+	"""
+	index = {name: i for i, name in enumerate(NETWORKS)}
+	cards = iter(cards)
+	count = 0
+	while True:
+		batch = list(itertools.islice(cards, BATCH_CARDS))
+		if not batch:
+			break
+		count += len(batch)
+		if fmt=='text':
+			f.write(''.join('%-16s (%s)\n' %(number, network) for number, network in batch).encode('utf-8'))
+		elif fmt=='csv':
+			f.write(''.join('%s,%s\n' %(number, network) for number, network in batch).encode('utf-8'))
 		else:
-			# Keep the even index numbers as is, 0-index notation
-			s += int(N[i])
-	
-	s *= 9
-	# Mod 10
-	check = s%10
-	
-	return check
+			f.write(b''.join(CARD_RECORD.pack(int(number), index[network]) for number, network in batch))
+	f.flush()
+	return count
+
+# Number of cards in each independently seeded block of the sharded generator
+BLOCK_CARDS = 1<<20
+
+def block_seed(seed, block):
+	"""
+	Derives the seed of one block of the sharded generator from the global seed
+
+	Each block gets its own random.Random stream, seeded with a hash of (seed, block), so blocks can
+	be generated in any order and on any worker and still give the same cards
+
+	:return: Seed of the block's random generator
+	:rtype: int
+	"""
+	return int.from_bytes(hashlib.sha256(b'%d:%d' %(seed, block)).digest(), 'little')
+
+def _block_sizes(n):
+	"""
+	Helper function listing the number of cards in each block of a sharded run of n cards
+
+	:return: Block sizes
+	:rtype: List[int]
+	"""
+	return [min(BLOCK_CARDS, n-start) for start in range(0, n, BLOCK_CARDS)]
+
+def shard_path(output, shard):
+	"""
+	Path of one shard file of a sharded run
+
+	:return: Shard file path
+	:rtype: str
+	"""
+	return '%s.%d' %(output, shard)
+
+def _write_shard(task):
+	"""
+	Helper function run by the generate_shards workers
+
+	Writes the blocks shard, shard+workers, shard+2*workers, ... of the run to the shard's file
+
+	:return: Number of cards written
+	:rtype: int
+	"""
+	n, output, shard, workers, seed, networks, fmt = task
+	sizes = _block_sizes(n)
+	count = 0
+	with open(shard_path(output, shard), 'wb') as f:
+		for block in range(shard, len(sizes), workers):
+			count += write_cards(generate_cards(sizes[block], networks=networks, seed=block_seed(seed, block)), f, fmt)
+	return count
+
+def generate_shards(n, output, workers, seed, networks=None, fmt='text'):
+	"""
+	Parallel credit card numbers generator
+
+	Generates n cards in blocks of BLOCK_CARDS, each with its own seed (see block_seed), on a pool of
+	worker processes; each worker writes its blocks to its own shard file (see shard_path)
+	The union of the shards only depends on n, seed and networks, not on the number of workers
+
+	:return: Paths of the shard files
+	:rtype: List[str]
+	"""
+	workers = max(1, min(workers, len(_block_sizes(n))))
+	tasks = [(n, output, shard, workers, seed, networks, fmt) for shard in range(workers)]
+	if workers==1:
+		list(map(_write_shard, tasks))
+	else:
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			list(executor.map(_write_shard, tasks))
+	return [shard_path(output, shard) for shard in range(workers)]
+
+class BloomFilter(object):
+	"""
+	Bloom filter over byte strings
+
+	A fixed-size bitmap with k hash positions per key, derived from one BLAKE2b digest by double
+	hashing; sized for capacity keys at the given false positive rate
+	"""
+
+	def __init__(self, capacity, error_rate=1e-3):
+		self.size = max(8, int(math.ceil(-capacity*math.log(error_rate)/math.log(2)**2)))
+		self.hashes = max(1, int(round(self.size/float(max(capacity, 1))*math.log(2))))
+		self.bits = bytearray((self.size+7)//8)
+
+	def add(self, key):
+		"""
+		Adds key to the filter
+
+		:return: True if key was (probably) already present, False if it is new
+		:rtype: bool
+		"""
+		digest = hashlib.blake2b(key, digest_size=16).digest()
+		h1 = int.from_bytes(digest[:8], 'little')
+		h2 = int.from_bytes(digest[8:], 'little') | 1
+		present = True
+		bits = self.bits
+		for i in range(self.hashes):
+			pos = (h1 + i*h2) % self.size
+			mask = 1<<(pos&7)
+			if not bits[pos>>3] & mask:
+				present = False
+				bits[pos>>3] |= mask
+		return present
+
+def _read_card(f, fmt):
+	"""
+	Helper function reading one record written by write_cards and its card number
+
+	:return: Raw record and card number, or empty bytes at the end of the file
+	:rtype: Tuple[bytes, bytes]
+	"""
+	if fmt=='binary':
+		record = f.read(CARD_RECORD.size)
+		return record, record[:8]
+	record = f.readline()
+	return record, record.split(b',' if fmt=='csv' else None, 1)[0] if record else b''
+
+def dedupe_shards(n, output, workers, fmt='text', error_rate=1e-3):
+	"""
+	Removes repeated card numbers (and possibly a few unique ones) across the shards of a sharded run
+
+	The blocks are read back in block order, whatever shard holds them, and every card whose number
+	was already seen (according to a Bloom filter) is dropped, so the result is reproducible too
+	A false positive of the filter drops a card that was in fact unique, at rate error_rate
+
+	:return: Number of cards dropped, false positives included
+	:rtype: int
+	"""
+	sizes = _block_sizes(n)
+	workers = max(1, min(workers, len(sizes)))
+	seen = BloomFilter(n, error_rate)
+	dropped = 0
+	sources = [open(shard_path(output, shard), 'rb') for shard in range(workers)]
+	targets = [open(shard_path(output, shard)+'.tmp', 'wb') for shard in range(workers)]
+	try:
+		for block, size in enumerate(sizes):
+			src, dst = sources[block%workers], targets[block%workers]
+			kept = []
+			for _ in range(size):
+				record, number = _read_card(src, fmt)
+				if seen.add(number):
+					dropped += 1
+				else:
+					kept.append(record)
+			dst.write(b''.join(kept))
+	finally:
+		for f in sources+targets:
+			f.close()
+	for shard in range(workers):
+		os.replace(shard_path(output, shard)+'.tmp', shard_path(output, shard))
+	return dropped
 
 def main():
 	"""
 	Main method
 
-	Takes user input and generates a set of credit card numbers
+	Takes the number of cards from the command line (or user input) and writes a set of credit
+	card numbers to stdout or to the output file
 
 	:return: None
 	:rtype: None
 	"""
+	parser = argparse.ArgumentParser(description="Generate random credit card numbers for testing")
+	parser.add_argument('n', type=int, nargs='?', help="how many credit card numbers to generate")
+	parser.add_argument('--seed', type=int, help="seed of the random generator, for reproducible output")
+	parser.add_argument('--networks', help="comma separated networks to draw from (default: all)")
+	parser.add_argument('--market-share', action='store_true', help="weight the networks by MARKET_SHARE instead of uniformly")
+	parser.add_argument('--output', help="write the cards to this file instead of stdout")
+	parser.add_argument('--format', choices=['text', 'csv', 'binary'], default='text', help="output format (default: %(default)s)")
+	parser.add_argument('--workers', type=int, help="generate in parallel, writing one shard file OUTPUT.k per worker")
+	parser.add_argument('--unique', action='store_true', help="drop repeated numbers across the shards (with --workers), "
+		"using a Bloom filter that can also drop a few unique numbers")
+	parser.add_argument('--error-rate', type=float, default=1e-3, help="false positive rate of the --unique filter, "
+		"so at most about N*rate unique numbers are dropped (default: %(default)s)")
+	args = parser.parse_args()
+	if args.workers and not args.output:
+		parser.error("--workers needs --output")
+	if args.unique and not args.workers:
+		parser.error("--unique needs --workers")
+	if not 0<args.error_rate<1:
+		parser.error("--error-rate must be between 0 and 1")
 
 	# Take user input
-	N = int(input("How many credit card numbers are to be generated?: "))
-
-	# Visa, Mastercard, Amex, Discover, Maestro, JCB, Diners International, Diners US & Canada, RuPay, MIR
-
-	# Prefixes for the card networks
-	# Retrived from https://en.wikipedia.org/wiki/Payment_card_number
-	networks = {}
-	networks['Visa'] = ['4']
-	networks['Mastercard'] = ['51', '52', '53', '54', '55']
-	for i in range(222100, 272100):
-		networks['Mastercard'].append(str(i))
-	networks['American Express'] = ['34', '37']
-	networks['Discover'] = ['6011', '64', '65']
-	networks['Maestro'] = ['50', '56', '57', '58', '639', '67']
-	networks['JCB'] = []
-	for i in range(3528, 3590):
-		networks['JCB'].append(str(i))
-	networks['Diners Club International'] = ['36', '300', '301', '302', '303', '304', '305', '3095', '38', '39']
-	networks['Diners Club US & Canada'] = ['54', '55'] # 55 is co-branded with Mastercard
-	networks['RuPay'] = ['60', '6521', '6522']
-	networks['MIR'] = ['2200', '2201', '2202', '2203', '2204']
-
-	netkeys = list(networks.keys())
-
-	# A list of numbers from 0 to 9 (inclusive) for later use
-	buff = [str(i) for i in range(10)]
-
-	# Randomly choose card networks and number distribution among these networks
-	for i in range(N):
-		# Choose a random network
-		chosen = random.choice(netkeys)
-		# Choose randomly an allowed prefix depending on network
-		ccnumber = random.choice(networks[chosen])
-
-		# Generate a random list of numbers except the check digit and the prefix
-		netlength = 16
-		if chosen=='American Express':
-			netlength = 15 # Amex has 15 length CC numbers
-		rem = netlength-len(ccnumber)-1
-		while rem:
-			ccnumber += random.choice(buff)
-			rem -= 1
-
-		# Generate check digit using the Luhn Algorithm
-		ccnumber += str(luhn_check_generator_10(ccnumber))
-
-		# Print card number and respective card network
-		if chosen=='American Express':
-			print(ccnumber+'  ('+chosen+')') # Extra space because of 15 digits
-		else:
-			print(ccnumber+' ('+chosen+')')
+	N = args.n
+	if N is None:
+		N = int(input("How many credit card numbers are to be generated?: "))
+
+	networks = args.networks.split(',') if args.networks else list(NETWORKS)
+	for name in networks:
+		if name not in NETWORKS:
+			parser.error("unknown network: "+name)
+	if args.market_share:
+		networks = {name: MARKET_SHARE[name] for name in networks}
+
+	if args.workers:
+		seed = args.seed
+		if seed is None:
+			seed = random.getrandbits(64)
+			print("Using seed %d" %(seed), file=sys.stderr)
+		paths = generate_shards(N, args.output, args.workers, seed, networks=networks, fmt=args.format)
+		if args.unique:
+			dropped = dedupe_shards(N, args.output, args.workers, fmt=args.format, error_rate=args.error_rate)
+			print("Dropped %d possible duplicates (Bloom filter)" %(dropped), file=sys.stderr)
+		print("Wrote %s" %(', '.join(paths)), file=sys.stderr)
+		return
+
+	cards = generate_cards(N, networks=networks, seed=args.seed)
+	if args.output:
+		with open(args.output, 'wb') as f:
+			write_cards(cards, f, args.format)
+	else:
+		write_cards(cards, sys.stdout.buffer, args.format)
 
 
 if __name__=='__main__':
@@ -16,40 +16,62 @@ Warnings:
 # Imports
 import sys
 
-def get_day(d, m, y, leap):
+# Optional dependency for the vectorized get_days
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+# Day names by weekday code
+DAYS = ('Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday')
+
+# Doomsday of the first year of each century
+# 1800-1899: Friday, 1900-1999: Wednesday, 2000-2099: Tuesday, 2100-2199: Sunday (cyclic)
+CENTURY_DOOMSDAYS = (5, 3, 2, 0)
+
+# The doomsday dates of every month
+# List from https://www.timeanddate.com/date/doomsday-rule.html
+DOOMSDAYS_COMMON = {1: 3, 2: 28, 3: 7, 4: 4, 5: 9, 6: 6, 7: 11, 8: 8, 9: 5, 10: 10, 11: 7, 12: 12}
+DOOMSDAYS_LEAP = {1: 4, 2: 29, 3: 7, 4: 4, 5: 9, 6: 6, 7: 11, 8: 8, 9: 5, 10: 10, 11: 7, 12: 12}
+
+# Number of days of every month in a common year
+MONTH_DAYS = {1: 31, 2: 28, 3: 31, 4: 30, 5: 31, 6: 30, 7: 31, 8: 31, 9: 30, 10: 31, 11: 30, 12: 31}
+
+# Month offsets of Sakamoto's method, indexed by month (index 0 unused)
+# Algorithm: https://en.wikipedia.org/wiki/Determination_of_the_day_of_the_week#Sakamoto's_methods
+SAKAMOTO = (0, 0, 3, 2, 5, 0, 3, 5, 1, 4, 6, 2, 4)
+
+def is_leap(y):
+	"""
+	Checks whether a year is a leap year in the Gregorian calendar
+
+	:return: True if leap year, False otherwise
+	:rtype: bool
+	"""
+	return y%4==0 and (y%100!=0 or y%400==0)
+
+def get_day(d, m, y, leap=None):
 	"""
 	Calculator method
 
 	Uses the algorithm to find the day
+	The leap year flag is computed from the year if not given
 
 	:return: Day corresponding to the DD-MM-YYYY date
 	:rtype: str
 	"""
-
-	# Initializing the mappings
-	dd = {0: 'Sunday', 1: 'Monday', 2: 'Tuesday', 3: 'Wednesday', 4: 'Thursday', 5: 'Friday', 6: 'Saturday'}
-	
-	# 1800-1899: Friday, 1900-1999: Wednesday, 2000-2099: Tuesday, 2100-2199: Sunday (cyclic)
-	cc = {0: 5, 1: 3, 2: 2, 3: 0}
+	if leap is None:
+		leap = is_leap(y)
 
 	# Follow steps of algorithm
-	num1 = int((y%100)/12)
-	num2 = int((y%100)%12)
-	num3 = int(num2/4)
-	num4 = cc[(int(y/100)-18)%4]
+	num1 = (y%100)//12
+	num2 = (y%100)%12
+	num3 = num2//4
+	num4 = CENTURY_DOOMSDAYS[(y//100-18)%4]
 	num5 = (num1+num2+num3+num4)%7
 
-	# Doomsday for Year Y
-	doomsday = dd[num5]
-
-	# Set up the doomsday dictionaries
-	# List from https://www.timeanddate.com/date/doomsday-rule.html
-	ddays_common = {1: 3, 2: 28, 3: 7, 4: 4, 5: 9, 6: 6, 7: 4, 7: 11, 8: 8, 9: 5, 10: 10, 11: 7, 12: 12}
-	ddays_leap = {1: 4, 2: 29, 3: 7, 4: 4, 5: 9, 6: 6, 7: 4, 7: 11, 8: 8, 9: 5, 10: 10, 11: 7, 12: 12}
-
-	dday = ddays_common[m]
-	if leap:
-		dday = ddays_leap[m]
+	# Doomsday of the month, in year Y
+	dday = DOOMSDAYS_LEAP[m] if leap else DOOMSDAYS_COMMON[m]
 
 	# Calculate the day
 	diff = abs(dday-d)%7
@@ -58,7 +80,74 @@ def get_day(d, m, y, leap):
 	else:
 		ans = (num5+diff)%7
 
-	return dd[ans]
+	return DAYS[ans]
+
+def _weekday_table():
+	"""
+	Helper function to tabulate Sakamoto's method over the 400 year Gregorian cycle
+	(146097 days, a whole number of weeks), so that a date only needs one lookup
+
+	:return: Table whose entry y*13+m is the weekday code of day 0 of month m in year y (mod 400)
+	:rtype: bytes
+	"""
+	table = bytearray(400*13)
+	for y in range(400):
+		for m in range(1, 13):
+			# January and February count as months of the previous year
+			yy = y-1 if m<3 else y
+			table[y*13+m] = (yy + yy//4 - yy//100 + yy//400 + SAKAMOTO[m])%7
+	return bytes(table)
+
+# Weekday code of day 0 of every month of the 400 year cycle (see _weekday_table)
+WEEKDAY_TABLE = _weekday_table()
+
+# Number of dates processed at a time by get_days with NumPy, to keep the temporaries in cache
+BLOCK_DATES = 1<<16
+
+def _get_days_numpy(d, m, y):
+	"""
+	Helper function running the table lookup of get_days element-wise on NumPy arrays, block by block
+
+	:return: Weekday codes
+	:rtype: numpy.ndarray
+	"""
+	d = np.asarray(d)
+	m = np.asarray(m)
+	y = np.asarray(y)
+	table = np.frombuffer(WEEKDAY_TABLE, dtype=np.uint8)
+	# (table entry + day) mod 7, for table entries up to 6 and days up to 31
+	mod7 = np.arange(64, dtype=np.uint8)%7
+
+	res = np.empty(len(d), dtype=np.uint8)
+	for start in range(0, len(d), BLOCK_DATES):
+		end = start+BLOCK_DATES
+		# Index computed in a fixed dtype, whatever the (possibly narrow or unsigned) input dtypes
+		idx = (y[start:end]%400).astype(np.intp)
+		idx *= 13
+		idx += m[start:end].astype(np.intp)
+		w = table.take(idx)
+		w += d[start:end].astype(np.uint8)
+		mod7.take(w, out=res[start:end])
+	return res
+
+def get_days(d, m, y):
+	"""
+	Batch calculator method
+
+	Finds the weekday codes (0 = Sunday, ..., 6 = Saturday, see DAYS) of the dates given as
+	sequences or NumPy arrays of days, months and years, with Sakamoto's method
+	The method is tabulated over the 400 year cycle by year and month, leap years included, so
+	every date costs one lookup, one addition and one reduction modulo 7
+	Runs element-wise on NumPy arrays if NumPy is available, and falls back to a Python loop
+
+	:return: Weekday codes (a uint8 array with NumPy)
+	:rtype: List[int]
+	"""
+	if np is not None:
+		return _get_days_numpy(d, m, y)
+
+	t = WEEKDAY_TABLE
+	return [(t[yy%400*13+mm]+dd)%7 for dd, mm, yy in zip(d, m, y)]
 
 def main():
 	"""
@@ -74,22 +163,14 @@ def main():
 	d = int(input("Enter DD (1-31): "))
 	m = int(input("Enter MM (1-12): "))
 	y = int(input("Enter YYYY: "))
-	month_to_num = {1: 31, 2: 28, 3: 31, 4: 30, 5: 31, 6: 30, 7: 31, 8: 31, 9: 30, 10: 31, 11: 30, 12: 31}
 	
 	# Check for invalid input
 	if y<0 or m<0 or m>12 or d<0 or d>31:
 		print("Invalid input. Exiting...", file=sys.stderr)
 		return
 
-	leap = False
-	if y%100==0:
-		if y%400==0:
-			leap = True
-	elif y%4==0:
-		leap = True
-	if leap:
-		month_to_num[2] += 1
-	if d>month_to_num[m]:
+	leap = is_leap(y)
+	if d>MONTH_DAYS[m]+(leap and m==2):
 		print("Invalid input. Exiting...", file=sys.stderr)
 		return
 	
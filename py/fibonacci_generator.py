@@ -2,12 +2,12 @@
 """
 coding=utf-8
 
-Python 3.5.2
+Python 3.8+
 
 Generate all the Fibonacci numbers between two given numbers A and B
 
 Warning(s): 
-1. Code does not handle exceptions or large inputs robustly
+1. Code does not handle exceptions robustly
 
 """
 
@@ -15,60 +15,469 @@ Warning(s):
 import sys
 import time
 import math
+import decimal
+import argparse
+import functools
+from array import array
+
+from parse_utils import parse_int
+
+# Optional dependency for the vectorized batch functions
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+def _residue_mask(m):
+	"""
+	Helper function to build the bitmask of the quadratic residues modulo m
+
+	:return: Integer whose bit r is set if r is a square modulo m
+	:rtype: int
+	"""
+	return sum(1<<r for r in {i*i%m for i in range(m)})
+
+# Quadratic residue filters: bit r of _QR64 is set if r is a square modulo 64, and _QR45045[r] is 1
+# if r is a square modulo 63, 65 and 11 (45045 = 63*65*11)
+# Together they reject about 99% of non-squares before any square root is taken
+_QR64 = _residue_mask(64)
+_QR63, _QR65, _QR11 = _residue_mask(63), _residue_mask(65), _residue_mask(11)
+_QR45045 = bytes((_QR63>>(r%63)) & (_QR65>>(r%65)) & (_QR11>>(r%11)) & 1 for r in range(45045))
 
 def perfect_square(N):
 	"""
 	Helper function to check whether a number is a perfect square
+	Exact for integers of any size (math.isqrt), with quadratic residue prefilters
 
 	:return: True if number is a perfect square, False otherwise
 	:rtype: bool
 	"""
-	if int(math.sqrt(N))*int(math.sqrt(N))==N:
-		return True
-	return False
+	if N<0 or not (_QR64>>(N&63)) & 1 or not _QR45045[N%45045]:
+		return False
+	r = math.isqrt(N)
+	return r*r==N
+
+def is_fibonacci(N):
+	"""
+	Checks whether a number is a Fibonacci number
+	A Fibonacci number N follows that 5*N*N+4 or 5*N*N-4 is a perfect square
+
+	:return: True if N is a Fibonacci number, False otherwise
+	:rtype: bool
+	"""
+	if N<0:
+		return False
+	N = 5*N*N
+	return perfect_square(N+4) or perfect_square(N-4)
+
+# Fibonacci numbers below 2^64, checked by lookup instead of square roots in is_fibonacci_many
+_SMALL_LIMIT = 1<<64
+_SMALL_FIBONACCI = [0, 1]
+while _SMALL_FIBONACCI[-1]+_SMALL_FIBONACCI[-2]<_SMALL_LIMIT:
+	_SMALL_FIBONACCI.append(_SMALL_FIBONACCI[-1]+_SMALL_FIBONACCI[-2])
+_SMALL_SET = frozenset(_SMALL_FIBONACCI)
+
+def is_fibonacci_many(values):
+	"""
+	Batch Fibonacci membership test
+
+	Values below 2^64 are looked up among the 94 Fibonacci numbers of that range, and larger ones
+	go through is_fibonacci; NumPy integer arrays are classified in a single np.isin call
+
+	:return: One bool per value (a bool array for NumPy input)
+	:rtype: List[bool]
+	"""
+	if np is not None and isinstance(values, np.ndarray) and values.dtype.kind in 'iu':
+		top = np.iinfo(values.dtype).max
+		return np.isin(values, np.array([f for f in _SMALL_FIBONACCI if f<=top], dtype=values.dtype))
+	small = _SMALL_SET
+	return [v in small if v<_SMALL_LIMIT else is_fibonacci(v) for v in values]
+
+# log(phi) and log(sqrt(5)), for estimating the index of a Fibonacci number from Binet's formula
+LOG_PHI = math.log((1+math.sqrt(5))/2)
+LOG_SQRT5 = math.log(5)/2
+
+def _fib_pair(n):
+	"""
+	Helper function to compute F(n) and F(n+1) by fast doubling
+	F(2k) = F(k)*(2*F(k+1)-F(k)) and F(2k+1) = F(k)^2+F(k+1)^2
+	Complexity: O(log n) multiplications
+
+	:return: F(n) and F(n+1)
+	:rtype: Tuple[int, int]
+	"""
+	a, b = 0, 1
+	for bit in bin(n)[2:]:
+		c = a*(2*b-a)
+		d = a*a+b*b
+		if bit=='1':
+			a, b = d, c+d
+		else:
+			a, b = c, d
+	return a, b
+
+def _fib_pair_mod(n, m):
+	"""
+	Helper function to compute F(n) and F(n+1) modulo m by fast doubling
+
+	:return: F(n) mod m and F(n+1) mod m
+	:rtype: Tuple[int, int]
+	"""
+	a, b = 0, 1%m
+	for bit in bin(n)[2:]:
+		c = a*(2*b-a)%m
+		d = (a*a+b*b)%m
+		if bit=='1':
+			a, b = d, (c+d)%m
+		else:
+			a, b = c, d
+	return a, b
+
+def _fib_lucas(n):
+	"""
+	Helper function to compute F(n) and the Lucas number L(n) by doubling
+	F(2k) = F(k)*L(k), L(2k) = L(k)^2-2*(-1)^k, and F(2k+1), L(2k+1) = (F+L)/2, (5F+L)/2 at 2k
+	Two multiplications per bit, against three for the F(n), F(n+1) pair
+
+	:return: F(n) and L(n)
+	:rtype: Tuple[int, int]
+	"""
+	f, l = 0, 2
+	odd = False
+	for bit in bin(n)[2:]:
+		f, l = f*l, l*l+2 if odd else l*l-2
+		odd = bit=='1'
+		if odd:
+			f, l = (f+l)>>1, (5*f+l)>>1
+	return f, l
+
+def fib(n):
+	"""
+	Computes the Fibonacci number F(n) (F(0) = 0, F(1) = 1) by doubling
+	The last, largest step only forms F(n), from F(n//2) and L(n//2)
+	Complexity: O(log n) multiplications of numbers of up to O(n) bits
+
+	:return: F(n)
+	:rtype: int
+	"""
+	if n<0:
+		raise ValueError("Negative index: %d" %(n))
+	if n==0:
+		return 0
+	f, l = _fib_lucas(n>>1)
+	if n&1:
+		# F(2k+1) = (F(2k)+L(2k))/2
+		return (f*l + (l*l+2 if n&2 else l*l-2))>>1
+	return f*l
+
+# Largest modulus whose Pisano period table (F(i) mod m over one period, at most 6m values) is
+# built and kept by fib_mod; larger moduli use fast doubling modulo m
+PISANO_TABLE_LIMIT = 1<<16
+
+@functools.lru_cache(maxsize=32)
+def _pisano_table(m):
+	"""
+	Helper function to tabulate F(i) mod m over one Pisano period (the period of F mod m)
+
+	:return: F(i) mod m for 0 <= i < period
+	:rtype: array
+	"""
+	table = array('H', [0])
+	a, b = 1%m, 1%m
+	while (a, b)!=(0, 1%m):
+		table.append(a)
+		a, b = b, (a+b)%m
+	return table
+
+@functools.lru_cache(maxsize=8)
+def _pisano_array(m):
+	"""
+	Helper function returning the Pisano period table of m as a NumPy array
+
+	:return: F(i) mod m for 0 <= i < period
+	:rtype: numpy.ndarray
+	"""
+	return np.frombuffer(_pisano_table(m), dtype=np.uint16).astype(np.int64)
+
+def pisano_period(m):
+	"""
+	Computes the Pisano period of m, the period of the Fibonacci numbers modulo m
+
+	:return: Pisano period
+	:rtype: int
+	"""
+	if m<1:
+		raise ValueError("Modulus must be positive: %d" %(m))
+	if m<=PISANO_TABLE_LIMIT:
+		return len(_pisano_table(m))
+	k = 1
+	a, b = 1, 1%m
+	while (a, b)!=(0, 1):
+		k += 1
+		a, b = b, (a+b)%m
+	return k
+
+def fib_mod(n, m):
+	"""
+	Computes F(n) mod m
+
+	For moduli up to PISANO_TABLE_LIMIT, one period of F mod m is tabulated on first use (and kept
+	for the most recent moduli), so later calls with the same modulus are a single lookup;
+	otherwise F(n) mod m is computed by fast doubling
+	Complexity: O(1) after the first call for small moduli, O(log n) otherwise
+
+	:return: F(n) mod m
+	:rtype: int
+	"""
+	if n<0:
+		raise ValueError("Negative index: %d" %(n))
+	if m<1:
+		raise ValueError("Modulus must be positive: %d" %(m))
+	if m<=PISANO_TABLE_LIMIT:
+		table = _pisano_table(m)
+		return table[n%len(table)]
+	return _fib_pair_mod(n, m)[0]
+
+def fib_mod_many(ns, m):
+	"""
+	Batch version of fib_mod
+
+	With NumPy and a modulus up to PISANO_TABLE_LIMIT, the indices are reduced modulo the Pisano
+	period and looked up in the table in one vectorized step
+
+	:return: F(n) mod m for every index n (an array for NumPy input, if m fits in 64 bits)
+	:rtype: List[int]
+	"""
+	if m<1:
+		raise ValueError("Modulus must be positive: %d" %(m))
+	if np is not None and m<=PISANO_TABLE_LIMIT:
+		table = _pisano_array(m)
+		if isinstance(ns, np.ndarray):
+			idx = ns
+		else:
+			ns = list(ns)
+			try:
+				idx = np.array(ns, dtype=np.int64)
+			except OverflowError:
+				# Indices beyond 64 bits
+				idx = None
+		if idx is not None and idx.dtype.kind in 'iu':
+			if idx.size and idx.min()<0:
+				raise ValueError("Negative index: %d" %(idx.min()))
+			res = table[idx%len(table)]
+			return res if isinstance(ns, np.ndarray) else res.tolist()
+	res = [fib_mod(n, m) for n in ns]
+	if np is not None and isinstance(ns, np.ndarray) and m<=1<<63:
+		return np.array(res, dtype=np.int64)
+	return res
+
+def _first_index(A):
+	"""
+	Helper function to find the first index k with F(k) >= A (A >= 0)
+
+	The index is estimated from Binet's formula, F(k) ~ phi^k/sqrt(5), with floating point logarithms
+	(math.log accepts integers of any size), and then corrected with exact integer comparisons
+
+	:return: k, F(k) and F(k+1)
+	:rtype: Tuple[int, int, int]
+	"""
+	k = 0
+	if A>1:
+		k = max(int(round((math.log(A)+LOG_SQRT5)/LOG_PHI)), 0)
+	a, b = _fib_pair(k)
+	while a<A:
+		k += 1
+		a, b = b, a+b
+	while k>0 and b-a>=A:
+		k -= 1
+		a, b = b-a, a
+	return k, a, b
+
+def iter_fibonacci(A, B):
+	"""
+	Fibonacci numbers generator
+
+	Yields the Fibonacci numbers between A and B (both inclusive) in increasing order, holding only
+	two terms at a time
+	Jumps straight to the first Fibonacci number not below A and continues by simple additions
+	The value 1 is listed twice (F(1) and F(2)) only when the range starts at 0
+
+	:return: Generator of Fibonacci numbers
+	:rtype: Iterator[int]
+	"""
+	if B<0 or A>B:
+		return
+	A = max(A, 0)
+	k, a, b = _first_index(A)
+	if k==1:
+		# Skip the repeated 1 when starting from it
+		a, b = b, a+b
+
+	while a<=B:
+		yield a
+		a, b = b, a+b
 
 def fibonacci(A, B):
 	"""
 	Fibonacci numbers generator
 
-	Generates the list of Fibonacci numbers between A and B (both inclusive)
+	Generates the list of Fibonacci numbers between A and B (both inclusive), see iter_fibonacci
 
 	:return: List of Fibonacci numbers
 	:rtype: List[int]
 	"""
-	res = []
-	n = A
-	flag1 = flag2 = 0
-	while n<=B:
-		# If two numbers not yet found
-		if flag1==0 or flag2==0:
-			# A Fibonacci number n follows that 5*n*n+4 or 5*n*n-4 is a perfect square
-			if perfect_square(5*n*n + 4) or perfect_square(5*n*n - 4):
-				res.append(n)
-				if flag1==0:
-					flag1 = 1
-					prev1 = n
-					n += 1
-				elif flag2==0:
-					flag2 = 1
-					prev2 = n
-					n = prev1+prev2
-			else:
-				n += 1
-		# Once two numbers are found, speed up by simply adding upto upper limit
+	return list(iter_fibonacci(A, B))
+
+# Distance to the nearest integer below which a floating point estimate of an index or a digit
+# count is not trusted, and the exact (big integer) computation is used instead
+_TOLERANCE = 1e-6
+
+def _index_at_least(A):
+	"""
+	Helper function to find the first index k with F(k) >= A (A >= 0) without computing F(k)
+
+	F(k) >= A exactly when k >= (log(A)+log(sqrt(5)))/log(phi), up to a correction that vanishes
+	quickly with k, so the estimate is rounded up unless it lies too close to an integer
+
+	:return: k
+	:rtype: int
+	"""
+	if A<_SMALL_LIMIT:
+		return _first_index(A)[0]
+	x = (math.log(A)+LOG_SQRT5)/LOG_PHI
+	k = math.ceil(x)
+	if min(k-x, x-k+1)>_TOLERANCE:
+		return k
+	return _first_index(A)[0]
+
+def _index_range(A, B):
+	"""
+	Helper function to find the indices of the first and last Fibonacci numbers listed by
+	iter_fibonacci(A, B)
+
+	:return: First and last index (the range is empty if the last is smaller)
+	:rtype: Tuple[int, int]
+	"""
+	if B<0 or A>B:
+		return 0, -1
+	lo = _index_at_least(max(A, 0))
+	if lo==1:
+		lo = 2
+	return lo, _index_at_least(B+1)-1
+
+def fibonacci_count(A, B):
+	"""
+	Counts the Fibonacci numbers between A and B (both inclusive), as listed by iter_fibonacci,
+	from the indices of the ends of the range only
+
+	:return: Number of Fibonacci numbers
+	:rtype: int
+	"""
+	lo, hi = _index_range(A, B)
+	return max(hi-lo+1, 0)
+
+LOG10_PHI = LOG_PHI/math.log(10)
+LOG10_SQRT5 = LOG_SQRT5/math.log(10)
+
+def fib_digits(k):
+	"""
+	Computes the number of decimal digits of F(k) without computing F(k)
+	F(k) ~ phi^k/sqrt(5), so it has floor(k*log10(phi)-log10(sqrt(5)))+1 digits, unless F(k) lies
+	too close to a power of 10 for floating point, where it is compared exactly
+
+	:return: Number of digits of F(k)
+	:rtype: int
+	"""
+	if k<100:
+		return len(str(_fib_pair(k)[0]))
+	y = k*LOG10_PHI-LOG10_SQRT5
+	d = round(y)
+	if abs(y-d)>_TOLERANCE+k*1e-15:
+		return math.floor(y)+1
+	return d+1 if fib(k)>=10**d else d
+
+def iter_fibonacci_digits(A, B):
+	"""
+	Yields the index and the number of digits of every Fibonacci number between A and B (both
+	inclusive), as listed by iter_fibonacci, without computing the numbers
+
+	:return: Generator of (index, number of digits)
+	:rtype: Iterator[Tuple[int, int]]
+	"""
+	lo, hi = _index_range(A, B)
+	for k in range(lo, hi+1):
+		yield k, fib_digits(k)
+
+# Exact integer arithmetic in decimal.Decimal, whose conversion to a string is linear in the number
+# of digits (int to str conversion is quadratic)
+_DECIMAL = decimal.Context(prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX, Emin=0)
+
+def _fib_pair_decimal(n):
+	"""
+	Helper function to compute F(n) and F(n+1) as Decimals by fast doubling (see _fib_pair)
+
+	:return: F(n) and F(n+1)
+	:rtype: Tuple[decimal.Decimal, decimal.Decimal]
+	"""
+	ctx = _DECIMAL
+	a, b = decimal.Decimal(0), decimal.Decimal(1)
+	for bit in bin(n)[2:]:
+		c = ctx.multiply(a, ctx.subtract(ctx.add(b, b), a))
+		d = ctx.add(ctx.multiply(a, a), ctx.multiply(b, b))
+		if bit=='1':
+			a, b = d, ctx.add(c, d)
 		else:
-			# No need to check for perfect squares
-			res.append(n)
-			prev1 = prev2
-			prev2 = n
-			n = prev1+prev2
+			a, b = c, d
+	return a, b
 
-	return res
+def iter_fibonacci_str(A, B):
+	"""
+	Yields the decimal representations of the Fibonacci numbers listed by iter_fibonacci(A, B)
 
-def main():
+	The range is located by index (see _index_range) and the terms are computed and added as
+	Decimals, so that every term is formatted in time linear in its number of digits
+
+	:return: Generator of decimal strings
+	:rtype: Iterator[str]
 	"""
-	Main method
+	lo, hi = _index_range(A, B)
+	if lo>hi:
+		return
+	add = _DECIMAL.add
+	a, b = _fib_pair_decimal(lo)
+	for _ in range(hi-lo+1):
+		yield str(a)
+		a, b = b, add(a, b)
+
+# Number of characters buffered by write_lines before each write
+WRITE_CHUNK = 1<<16
 
+def write_lines(values, f):
+	"""
+	Writes values, one per line, to a binary file object in buffered chunks
+
+	:return: Number of values written
+	:rtype: int
+	"""
+	count = 0
+	chunk = []
+	size = 0
+	for value in values:
+		line = str(value)
+		chunk.append(line)
+		size += len(line)+1
+		count += 1
+		if size>=WRITE_CHUNK:
+			f.write(('\n'.join(chunk) + '\n').encode('ascii'))
+			chunk = []
+			size = 0
+	if chunk:
+		f.write(('\n'.join(chunk) + '\n').encode('ascii'))
+	f.flush()
+	return count
+
+def interactive():
+	"""
 	Takes user input and prints the list of Fibonacci numbers in range
 
 	:return: None
@@ -96,14 +505,68 @@ def main():
 		return
 	
 	starttime = time.time()
-	res = fibonacci(A, B)
+	res = fibonacci(A, B) if prompt else fibonacci_count(A, B)
 	endtime = time.time()
 
 	# Print answer
-	print("Found %d Fibonacci numbers in %f seconds" %(len(res), endtime-starttime))
+	print("Found %d Fibonacci numbers in %f seconds" %(len(res) if prompt else res, endtime-starttime))
 	
 	if prompt:
 		print(res)
 
+def main(argv=None):
+	"""
+	Main method
+
+	Without arguments, takes user input and prints the list of Fibonacci numbers in range
+	Otherwise parses the command line and streams the Fibonacci numbers between A and B (or only
+	their count, or their digit counts) to stdout or to the output file; the summary line goes to stderr
+
+	:return: None
+	:rtype: None
+	"""
+	argv = sys.argv[1:] if argv is None else argv
+	if not argv:
+		interactive()
+		return
+	if hasattr(sys, 'set_int_max_str_digits'):
+		# Limits and terms can have any number of digits
+		sys.set_int_max_str_digits(0)
+
+	parser = argparse.ArgumentParser(description="Generate all the Fibonacci numbers between two given numbers A and B")
+	parser.add_argument('--from', dest='A', type=parse_int, default=0, help="lower limit A, e.g. 1000, 1e6 or 10**1000 (default: %(default)s)")
+	parser.add_argument('--to', dest='B', type=parse_int, required=True, help="upper limit B")
+	mode = parser.add_mutually_exclusive_group()
+	mode.add_argument('--count-only', action='store_true', help="only print the number of Fibonacci numbers")
+	mode.add_argument('--digits-only', action='store_true',
+		help="print the index and number of digits of every Fibonacci number instead of the number")
+	parser.add_argument('--output', help="write to this file instead of stdout")
+	args = parser.parse_args(argv)
+
+	A, B = args.A, args.B
+	# Check for invalid input
+	if A>B:
+		print("Invalid input. Exiting...", file=sys.stderr)
+		sys.exit(1)
+
+	starttime = time.perf_counter()
+	if args.count_only:
+		count = fibonacci_count(A, B)
+		print(count)
+	else:
+		if args.digits_only:
+			values = ("%d %d" %(k, d) for k, d in iter_fibonacci_digits(A, B))
+		else:
+			values = iter_fibonacci_str(A, B)
+		if args.output:
+			with open(args.output, 'wb') as f:
+				count = write_lines(values, f)
+		else:
+			count = write_lines(values, sys.stdout.buffer)
+	endtime = time.perf_counter()
+
+	# Print summary
+	print("Found %d Fibonacci numbers in %f seconds" %(count, endtime-starttime), file=sys.stderr)
+
 if __name__=='__main__':
 	main()
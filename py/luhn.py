@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+"""
+coding=utf-8
+
+Python 3.5.2
+
+Shared Luhn kernels used by luhn_checker and credit_card_number_generator
+Luhn mod 10 for numbers given as str, bytes or int, and Luhn mod N for alphanumeric identifiers
+Algorithm: https://en.wikipedia.org/wiki/Luhn_algorithm
+
+Run this file directly for a micro-benchmark against the plain per-digit implementation
+
+"""
+
+# Imports
+import sys
+
+# Translation tables mapping each ASCII digit to its contribution to the Luhn sum,
+# as is (PLAIN) or doubled with its digits added (DOUBLED: 0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+_PLAIN = bytes.maketrans(b'0123456789', bytes(range(10)))
+_DOUBLED = bytes.maketrans(b'0123456789', bytes([0, 2, 4, 6, 8, 1, 3, 5, 7, 9]))
+
+# Luhn contribution of every 2 and 4 digit chunk, read from the right (units digit first)
+# _PAIR_PAYLOAD/_QUAD_PAYLOAD double the units digit (a payload without its check digit), while
+# _PAIR_FULL/_QUAD_FULL keep it (a full number, whose units digit is the check digit)
+_DOUBLE = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+_PAIR_PAYLOAD = [_DOUBLE[v%10] + v//10 for v in range(100)]
+_PAIR_FULL = [v%10 + _DOUBLE[v//10] for v in range(100)]
+_QUAD_PAYLOAD = [_PAIR_PAYLOAD[v%100] + _PAIR_PAYLOAD[v//100] for v in range(10000)]
+_QUAD_FULL = [_PAIR_FULL[v%100] + _PAIR_FULL[v//100] for v in range(10000)]
+
+# Default alphabet of the Luhn mod N functions
+ALPHANUMERIC = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+def _int_sum(N, quads):
+	"""
+	Helper function to compute the Luhn sum of a non-negative int, four digits at a time
+	(negative ints never reach 0 by floor division, so callers must reject them)
+
+	:return: Luhn sum (not reduced)
+	:rtype: int
+	"""
+	s = 0
+	while N:
+		s += quads[N%10000]
+		N //= 10000
+	return s
+
+def luhn_valid_bytes(N):
+	"""
+	Checks a number given as ASCII bytes, check digit included, without raising
+
+	Every second digit from the right (starting with the check digit) is summed as is and the
+	others doubled, all through bytes.translate and sum, so no Python-level work is done per digit
+
+	:return: True if N is a valid non-empty decimal number, False otherwise
+	:rtype: bool
+	"""
+	return N.isdigit() and (sum(N[::-2].translate(_PLAIN)) + sum(N[-2::-2].translate(_DOUBLED)))%10==0
+
+def luhn_check_generator_10(N):
+	"""
+	Luhn mod 10 check digit generator
+
+	Generates the check digit of a numeric sequence (str, bytes or int) using the Luhn Algorithm
+	Digits are doubled starting from the rightmost one of N
+
+	:return: Generated check digit
+	:rtype: int
+	"""
+	if type(N) is str:
+		N = N.encode('ascii', 'replace')
+	elif isinstance(N, int):
+		if N<0:
+			raise ValueError("Not a decimal number: %r" %(N))
+		return -_int_sum(N, _QUAD_PAYLOAD)%10
+	elif type(N) is not bytes:
+		N = bytes(N)
+	if not N.isdigit() and N:
+		raise ValueError("Not a decimal number: %r" %(N))
+	return -(sum(N[::-2].translate(_DOUBLED)) + sum(N[-2::-2].translate(_PLAIN)))%10
+
+def luhn_checker_10(N):
+	"""
+	Luhn mod 10 check digit checker
+
+	Checks the check digit of a numeric sequence (str, bytes or int) using the Luhn Algorithm
+	The last digit is taken to be the check digit
+
+	:return: True if N is valid, False if invalid
+	:rtype: bool
+	"""
+	if type(N) is str:
+		N = N.encode('ascii', 'replace')
+	elif isinstance(N, int):
+		if N<0:
+			raise ValueError("Not a decimal number: %r" %(N))
+		return _int_sum(N, _QUAD_FULL)%10==0
+	elif type(N) is not bytes:
+		N = bytes(N)
+	if not N.isdigit():
+		if N:
+			raise ValueError("Not a decimal number: %r" %(N))
+		return False
+	return (sum(N[::-2].translate(_PLAIN)) + sum(N[-2::-2].translate(_DOUBLED)))%10==0
+
+def check_digits(payloads):
+	"""
+	Batch Luhn mod 10 check digit generator
+
+	:return: Check digits of the ASCII digit payloads, as ASCII bytes, one per payload
+	:rtype: bytes
+	"""
+	return bytes(48 + (-(sum(p[::-2].translate(_DOUBLED)) + sum(p[-2::-2].translate(_PLAIN))))%10 for p in payloads)
+
+# Luhn mod N tables of the alphabets used so far: alphabet -> (CODES, DOUBLED, N)
+_MOD_N_TABLES = {}
+
+def _mod_n_tables(alphabet):
+	"""
+	Helper function to build (and cache in _MOD_N_TABLES) the Luhn mod N translation tables of an alphabet
+
+	CODES maps each character to its index in the alphabet, and DOUBLED maps it to its doubled
+	index with its base-N digits added; both map any other byte to 255
+
+	:return: CODES and DOUBLED tables, and the size of the alphabet
+	:rtype: Tuple[bytes, bytes, int]
+	"""
+	n = len(alphabet)
+	chars = alphabet.encode('ascii')
+	if n<2 or n>255 or len(set(chars))!=n:
+		raise ValueError("Alphabet must have 2 to 255 distinct ASCII characters")
+	codes = bytearray([255]) * 256
+	doubled = bytearray([255]) * 256
+	for i, c in enumerate(chars):
+		codes[c] = i
+		doubled[c] = 2*i//n + 2*i%n
+	if len(_MOD_N_TABLES)>=16:
+		_MOD_N_TABLES.clear()
+	tables = _MOD_N_TABLES[alphabet] = bytes(codes), bytes(doubled), n
+	return tables
+
+def luhn_check_generator_n(N, alphabet=ALPHANUMERIC):
+	"""
+	Luhn mod N check character generator
+
+	Generates the check character of a sequence of characters from alphabet (N = len(alphabet))
+	The characters are translated straight to their contributions and summed once, with the
+	tables looked up in a plain dict, to keep the per-call overhead low on short identifiers
+	Algorithm: https://en.wikipedia.org/wiki/Luhn_mod_N_algorithm
+
+	:return: Generated check character
+	:rtype: str
+	"""
+	codes, doubled, n = _MOD_N_TABLES.get(alphabet) or _mod_n_tables(alphabet)
+	if type(N) is str:
+		N = N.encode('ascii', 'replace')
+	N = N[::-2].translate(doubled) + N[-2::-2].translate(codes)
+	if 255 in N:
+		raise ValueError("Characters outside the alphabet")
+	return alphabet[-sum(N)%n]
+
+def luhn_checker_n(N, alphabet=ALPHANUMERIC):
+	"""
+	Luhn mod N check character checker
+
+	Checks the check character (the last one) of a sequence of characters from alphabet
+
+	:return: True if N is valid, False if invalid or empty
+	:rtype: bool
+	"""
+	codes, doubled, n = _MOD_N_TABLES.get(alphabet) or _mod_n_tables(alphabet)
+	if type(N) is str:
+		N = N.encode('ascii', 'replace')
+	if not N:
+		return False
+	N = N[::-2].translate(codes) + N[-2::-2].translate(doubled)
+	if 255 in N:
+		raise ValueError("Characters outside the alphabet")
+	return sum(N)%n==0
+
+def _reference_generator_10(N):
+	"""
+	Plain per-digit Luhn mod 10 implementation, the baseline of the micro-benchmark
+
+	:return: Generated check digit
+	:rtype: int
+	"""
+	digital = {0: 0, 2: 2, 4: 4, 6: 6, 8: 8, 10: 1, 12: 3, 14: 5, 16: 7, 18: 9}
+	s = 0
+	for i in range(len(N)):
+		if (len(N)-i)&1:
+			s += digital[int(N[i])*2]
+		else:
+			s += int(N[i])
+	return s*9%10
+
+def _reference_generator_n(N, alphabet=ALPHANUMERIC):
+	"""
+	Plain per-character Luhn mod N implementation, the baseline of the micro-benchmark
+
+	:return: Generated check character
+	:rtype: str
+	"""
+	n = len(alphabet)
+	factor = 2
+	s = 0
+	for c in reversed(N):
+		addend = factor*alphabet.index(c)
+		factor = 3-factor
+		s += addend//n + addend%n
+	return alphabet[-s%n]
+
+# Speedup per call over the plain implementations that every kernel is expected to reach
+TARGET_SPEEDUP = 5
+
+def _benchmark(number=100000):
+	"""
+	Micro-benchmark of the kernels against the plain per-digit implementations, flagging any
+	kernel below TARGET_SPEEDUP
+
+	:return: None
+	:rtype: None
+	"""
+	import timeit
+
+	payload = '453201511283036'
+	payload_bytes = payload.encode()
+	payload_int = int(payload)
+	ident = 'A1B2C3D4E5F6G7H8'
+	cases = [
+		('mod 10, str', lambda: _reference_generator_10(payload), lambda: luhn_check_generator_10(payload)),
+		('mod 10, bytes', lambda: _reference_generator_10(payload), lambda: luhn_check_generator_10(payload_bytes)),
+		('mod 10, int', lambda: _reference_generator_10(payload), lambda: luhn_check_generator_10(payload_int)),
+		('mod 36, str', lambda: _reference_generator_n(ident), lambda: luhn_check_generator_n(ident)),
+	]
+	print("%-16s %14s %14s %8s" %('Kernel', 'Plain (us)', 'Kernel (us)', 'Speedup'))
+	for name, reference, kernel in cases:
+		assert reference()==kernel()
+		t_ref = min(timeit.repeat(reference, number=number, repeat=3))/number*1e6
+		t_new = min(timeit.repeat(kernel, number=number, repeat=3))/number*1e6
+		speedup = t_ref/t_new
+		note = "" if speedup>=TARGET_SPEEDUP else "  below the %dx target" %(TARGET_SPEEDUP)
+		print("%-16s %14.3f %14.3f %7.1fx%s" %(name, t_ref, t_new, speedup, note))
+
+if __name__=='__main__':
+	_benchmark(int(sys.argv[1]) if len(sys.argv)>1 else 100000)
@@ -7,66 +7,220 @@ Python 3.5.2
 Check if a identification card number is valid using Luhn Check Algorithm (mod 10)
 Original patent by Hans Peter Luhn (https://patents.google.com/patent/US2950048)
 
+Usage: python luhn_checker.py [FILE [--workers N] [--delimiter D] [--column K] [--header]]
+
 Warning(s): 
 1. Code does not handle exceptions or large inputs robustly
 
 """
 
 # Imports
+import os
 import sys
+import mmap
+import argparse
+import itertools
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+# Shared Luhn kernels (luhn_check_generator_10 and luhn_checker_10 are re-exported from here)
+from luhn import luhn_check_generator_10, luhn_checker_10, luhn_valid_bytes
+
+# Optional dependency for the vectorized batch validator
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+# Number of rows validated at once by the NumPy path, to bound its temporary arrays
+_BATCH_ROWS = 1<<16
+
+# Default size of the file chunks handed to the check_file workers
+CHUNK_BYTES = 1<<24
+
+def _luhn_check_numpy(arr):
+	"""
+	Helper function to check a NumPy array of fixed-width byte strings (e.g. dtype S19)
+
+	The array is transposed into one row per digit position (shorter numbers are padded with
+	trailing NUL bytes), so that every step below is a reduction across the numbers
+	Only four sums are taken: the digits and the count of digits >= 5 over the even and the odd
+	positions, since doubling d adds 2d-9 when d >= 5 and 2d otherwise; the parity of each
+	number's length decides which positions are the doubled ones
+
+	:return: Boolean mask, True where the number is valid
+	:rtype: numpy.ndarray
+	"""
+	width = arr.dtype.itemsize
+	res = np.empty(len(arr), dtype=bool)
+
+	for start in range(0, len(arr), _BATCH_ROWS):
+		rows = np.ascontiguousarray(arr[start:start+_BATCH_ROWS]).view(np.uint8).reshape(-1, width)
+		cols = np.ascontiguousarray(rows.T)
+		present = cols!=0
+		length = present.sum(axis=0, dtype=np.int32)
+		digits = cols-np.uint8(48)
+		isdigit = digits<=9
+		ok = ~np.logical_or.reduce(present & ~isdigit, axis=0) & (length>0)
+		digits *= isdigit
+
+		even, odd = digits[0::2], digits[1::2]
+		s_even = even.sum(axis=0, dtype=np.int32)
+		s_odd = odd.sum(axis=0, dtype=np.int32)
+		c_even = (even>=5).sum(axis=0, dtype=np.int32)
+		c_odd = (odd>=5).sum(axis=0, dtype=np.int32)
+
+		# With an even length the even positions are doubled, with an odd length the odd ones
+		total = np.where(length&1, s_even + 2*s_odd - 9*c_odd, 2*s_even - 9*c_even + s_odd)
+		res[start:start+len(total)] = ok & (total%10==0)
+
+	return res
+
+def luhn_check_many(numbers):
+	"""
+	Batch Luhn mod 10 checker
+
+	Checks many numbers at once, the last digit of each being the check digit
+	numbers may be a NumPy array of fixed-width byte strings (dtype S, fully vectorized), a
+	newline-delimited bytes buffer, or any iterable of str or bytes
+
+	:return: Boolean mask, True where the number is valid (a NumPy array for NumPy input)
+	:rtype: List[bool] or numpy.ndarray
+	"""
+	if np is not None and isinstance(numbers, np.ndarray):
+		if numbers.dtype.kind!='S':
+			numbers = numbers.astype('S')
+		return _luhn_check_numpy(numbers)
+	if isinstance(numbers, (bytes, bytearray, memoryview)):
+		numbers = bytes(numbers).splitlines()
+	return [luhn_valid_bytes(N if isinstance(N, bytes) else N.encode('ascii', 'replace')) for N in numbers]
+
+def _chunk_bounds(mm, chunk_bytes, start=0):
+	"""
+	Helper function to split a mapped file, from start on, into chunks of about chunk_bytes that
+	end on line boundaries
 
-def luhn_check_generator_10(N):
+	:return: List of (start, end) byte offsets
+	:rtype: List[Tuple[int, int]]
 	"""
-	Luhn mod 10 check digit generator
+	bounds = []
+	while start<len(mm):
+		end = mm.find(b'\n', min(start+chunk_bytes, len(mm))-1)
+		end = len(mm) if end==-1 else end+1
+		bounds.append((start, end))
+		start = end
+	return bounds
+
+def _check_chunk(task):
+	"""
+	Helper function run by the check_file workers
 
-	Generates the check digit of a numeric sequence using the Luhn Algorithm
+	Maps the file, checks every non-empty line of the chunk [start, end) (or the given field of
+	each line for delimited files) and collects the offsets of the invalid lines
 
-	:return: Generated check digit
-	:rtype: int
+	:return: Number of valid and invalid numbers and the byte offsets of the invalid lines
+	:rtype: Tuple[int, int, array]
 	"""
-	# Digital sum of numbers
-	digital = {0: 0, 2: 2, 4: 4, 6: 6, 8: 8, 10: 1, 12: 3, 14: 5, 16: 7, 18: 9}
-
-	# Storing the sum
-	s = 0
-	for i in range(len(N)):
-		if i&1:
-			# Double the odd index numbers, 0-index notation
-			s += digital[int(N[i])*2]
+	path, start, end, delimiter, column = task
+	with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+		lines = mm[start:end].split(b'\n')
+
+	valid = 0
+	invalid = array('Q')
+	offsets = itertools.accumulate(itertools.chain((start,), (len(line)+1 for line in lines)))
+	for line, offset in zip(lines, offsets):
+		line = line.strip()
+		if not line:
+			continue
+		if delimiter is not None:
+			fields = line.split(delimiter)
+			line = fields[column].strip().strip(b'"') if column<len(fields) else b''
+		if luhn_valid_bytes(line):
+			valid += 1
 		else:
-			# Keep the even index numbers as is, 0-index notation
-			s += int(N[i])
-	
-	s *= 9
-	# Mod 10
-	check = s%10
-	
-	return check
-
-def luhn_checker_10(N):
+			invalid.append(offset)
+	return valid, len(invalid), invalid
+
+def iter_check_file(path, workers=None, delimiter=None, column=0, skip_header=False, chunk_bytes=CHUNK_BYTES):
 	"""
-	Luhn mod 10 check digit checker
+	Luhn mod 10 checker for files, yielding the results chunk by chunk
 
-	Checks the check digit of a numeric sequence using the Luhn Algorithm
+	Checks a newline-delimited file of numbers, or one column of a delimited (e.g. CSV) file
+	The file is memory mapped and split into chunks on line boundaries, which are checked by a
+	pool of worker processes; only the chunk being checked is ever held in memory by a worker, and
+	the results of every chunk are yielded in file order as soon as they are available
 
-	:return: True if N is valid, False if invalid
-	:rtype: bool
+	:return: Generator of the number of valid and invalid numbers and the byte offsets of the
+		invalid lines of every chunk
+	:rtype: Iterator[Tuple[int, int, array]]
+	"""
+	workers = workers or os.cpu_count() or 1
+	if isinstance(delimiter, str):
+		delimiter = delimiter.encode()
+	if os.path.getsize(path)==0:
+		return
+
+	with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+		start = mm.find(b'\n')+1 if skip_header else 0
+		if skip_header and start==0:
+			return
+		bounds = _chunk_bounds(mm, chunk_bytes, start)
+	tasks = [(path, a, b, delimiter, column) for a, b in bounds]
+
+	if workers==1:
+		yield from map(_check_chunk, tasks)
+		return
+	with ProcessPoolExecutor(max_workers=workers) as executor:
+		yield from executor.map(_check_chunk, tasks)
+
+def check_file(path, workers=None, delimiter=None, column=0, skip_header=False, chunk_bytes=CHUNK_BYTES):
 	"""
+	Luhn mod 10 checker for files
 
-	# In this program, the last digit is taken to be the check digit
-	if luhn_check_generator_10(N[:-1])==int(N[-1]):
-		return True
-	return False
+	Collects the results of iter_check_file over the whole file
+
+	:return: Number of valid and invalid numbers and the byte offsets of the invalid lines
+	:rtype: Tuple[int, int, array]
+	"""
+	valid = invalid = 0
+	offsets = array('Q')
+	for v, i, o in iter_check_file(path, workers, delimiter, column, skip_header, chunk_bytes):
+		valid += v
+		invalid += i
+		offsets.extend(o)
+	return valid, invalid, offsets
 
 def main():
 	"""
 	Main method
 
-	Takes user input and checks or generates check digit
+	With a file argument, checks every number in the file, printing the byte offsets of the invalid
+	lines to stdout and the summary counts to stderr
+	Otherwise takes user input and checks or generates check digit
 
 	:return: None
 	:rtype: None
 	"""
+	parser = argparse.ArgumentParser(description="Check numbers using the Luhn Check Algorithm (mod 10)")
+	parser.add_argument('file', nargs='?', help="newline-delimited or delimited (e.g. CSV) file of numbers to check")
+	parser.add_argument('--workers', type=int, help="worker processes (default: all cores)")
+	parser.add_argument('--delimiter', help="field delimiter of the file, e.g. ',' (default: one number per line)")
+	parser.add_argument('--column', type=int, default=0, help="0-based column holding the number (default: %(default)s)")
+	parser.add_argument('--header', action='store_true', help="skip the first line of the file")
+	args = parser.parse_args()
+
+	if args.file:
+		valid = invalid = 0
+		out = sys.stdout
+		# The offsets of every chunk are written as soon as the chunk is checked
+		for v, i, offsets in iter_check_file(args.file, workers=args.workers, delimiter=args.delimiter,
+				column=args.column, skip_header=args.header):
+			valid += v
+			invalid += i
+			out.write(''.join('%d\n' %(offset) for offset in offsets))
+			out.flush()
+		print('Checked %d numbers: %d valid, %d invalid' %(valid+invalid, valid, invalid), file=sys.stderr)
+		return
 
 	# Take user input
 	N = input("Enter number without spaces: ")
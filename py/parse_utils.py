@@ -0,0 +1,25 @@
+#!/usr/bin/env python
+"""
+coding=utf-8
+
+Python 3.5.2
+
+Shared command line helpers used by fibonacci_generator and primes_benchmark
+
+"""
+
+def parse_int(s):
+	"""
+	Helper function to parse limits such as 1000000, 1e6 or 10**6 exactly
+
+	:return: Parsed integer
+	:rtype: int
+	"""
+	s = s.strip().lower().replace('_', '')
+	if '**' in s:
+		base, exp = s.split('**')
+		return int(base)**int(exp)
+	if 'e' in s:
+		mantissa, exp = s.split('e')
+		return int(mantissa)*10**int(exp)
+	return int(s)
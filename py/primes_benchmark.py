@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+"""
+coding=utf-8
+
+Python 3.8+
+
+Benchmark suite for the prime number engines in primes_generator
+
+Every engine is run on a ladder of upper limits with warmup runs and repeats timed with
+time.perf_counter, plus one extra run under tracemalloc to capture the peak memory
+Each result is cross-checked against the Sieve of Eratosthenes and the results can be written
+as JSON or CSV to compare releases
+
+Usage: python -m primes_benchmark --sizes 1e4,1e5,1e6 --repeats 5 --json out.json
+
+"""
+
+# Imports
+import sys
+import csv
+import json
+import time
+import argparse
+import platform
+import statistics
+import tracemalloc
+
+import primes_generator as pg
+from parse_utils import parse_int
+
+# Engines under test: name -> (function of (A, B) returning a list or a count of primes, default size cap)
+# A cap of None means the engine runs at every size of the ladder
+ENGINES = {
+	'naive': (pg.naive, 10**5),
+	'eratosthenes': (pg.eratosthenes, None),
+	'segmented_eratosthenes': (pg.segmented_eratosthenes, None),
+	'atkin': (pg.atkin, 10**7),
+	'atkin_numpy': (lambda A, B: pg.atkin(A, B, backend='numpy'), None),
+	'sundaram': (pg.sundaram, 10**7),
+	'sundaram_numpy': (lambda A, B: pg.sundaram(A, B, backend='numpy'), None),
+	'parallel_primes': (pg.parallel_primes, None),
+	'primes_in_window': (pg.primes_in_window, 10**6),
+	'prime_count': (pg.prime_count, None),
+}
+
+# Columns of the CSV output, in order
+FIELDS = ['engine', 'lower', 'upper', 'repeats', 'best_s', 'median_s', 'mean_s', 'peak_bytes', 'count', 'ok']
+
+def _count(res):
+	"""
+	Helper function to reduce an engine result (a list of primes or a count) to a count
+
+	:return: Number of primes
+	:rtype: int
+	"""
+	return res if isinstance(res, int) else len(res)
+
+def run(sizes, lower=0, engines=None, repeats=5, warmup=1, caps=None, verbose=False):
+	"""
+	Runs the benchmark
+
+	Times every engine on every upper limit of sizes (skipping sizes above the engine's cap) and
+	checks its output against the Sieve of Eratosthenes
+
+	:return: One result row per engine and size, with the keys listed in FIELDS
+	:rtype: List[Dict]
+	"""
+	engines = engines or list(ENGINES)
+	caps = caps or {}
+	rows = []
+
+	for B in sizes:
+		reference = pg.eratosthenes(lower, B)
+		for name in engines:
+			func, cap = ENGINES[name]
+			cap = caps.get(name, cap)
+			if cap is not None and B>cap:
+				continue
+
+			for _ in range(warmup):
+				func(lower, B)
+
+			times = []
+			for _ in range(max(repeats, 1)):
+				starttime = time.perf_counter()
+				res = func(lower, B)
+				times.append(time.perf_counter()-starttime)
+
+			# Measure the memory separately, since tracing slows down the timed runs
+			tracemalloc.start()
+			func(lower, B)
+			peak = tracemalloc.get_traced_memory()[1]
+			tracemalloc.stop()
+
+			ok = res==reference if isinstance(res, list) else res==len(reference)
+			rows.append({
+				'engine': name,
+				'lower': lower,
+				'upper': B,
+				'repeats': len(times),
+				'best_s': min(times),
+				'median_s': statistics.median(times),
+				'mean_s': statistics.mean(times),
+				'peak_bytes': peak,
+				'count': _count(res),
+				'ok': ok,
+			})
+			if verbose:
+				print_table(rows[-1:], header=len(rows)==1)
+
+	return rows
+
+def print_table(rows, header=True, file=sys.stdout):
+	"""
+	Prints result rows as an aligned table
+
+	:return: None
+	:rtype: None
+	"""
+	if header:
+		print("%-24s %14s %12s %12s %14s %12s %4s" %('Method', 'Upper', 'Best (s)', 'Median (s)', 'Peak (bytes)', '# Primes', 'OK'), file=file)
+	for row in rows:
+		print("%-24s %14d %12.6f %12.6f %14d %12d %4s" %(row['engine'], row['upper'], row['best_s'], row['median_s'],
+			row['peak_bytes'], row['count'], 'yes' if row['ok'] else 'NO'), file=file)
+
+def write_json(rows, path):
+	"""
+	Writes result rows, along with the interpreter and platform they were measured on, as JSON
+
+	:return: None
+	:rtype: None
+	"""
+	report = {
+		'python': platform.python_version(),
+		'implementation': platform.python_implementation(),
+		'platform': platform.platform(),
+		'numpy': pg.np.__version__ if pg.np is not None else None,
+		'rows': rows,
+	}
+	with open(path, 'w') as f:
+		json.dump(report, f, indent=2, sort_keys=True)
+
+def write_csv(rows, path):
+	"""
+	Writes result rows as CSV
+
+	:return: None
+	:rtype: None
+	"""
+	with open(path, 'w', newline='') as f:
+		writer = csv.DictWriter(f, fieldnames=FIELDS)
+		writer.writeheader()
+		writer.writerows(rows)
+
+def main(argv=None):
+	"""
+	Main method
+
+	Parses the command line, runs the benchmark and writes the requested reports
+	Exits with status 1 if some engine disagrees with the reference
+
+	:return: None
+	:rtype: None
+	"""
+	parser = argparse.ArgumentParser(description="Benchmark the prime number engines of primes_generator")
+	parser.add_argument('--sizes', default='1e4,1e5,1e6', help="comma separated upper limits (default: %(default)s)")
+	parser.add_argument('--lower', default='0', help="lower limit of every range (default: %(default)s)")
+	parser.add_argument('--engines', help="comma separated engines to run (default: all of %s)" %(', '.join(ENGINES)))
+	parser.add_argument('--repeats', type=int, default=5, help="timed runs per engine and size (default: %(default)s)")
+	parser.add_argument('--warmup', type=int, default=1, help="untimed runs before timing (default: %(default)s)")
+	parser.add_argument('--cap', action='append', default=[], metavar='ENGINE=SIZE',
+		help="largest size to run an engine at, e.g. naive=1e5 (may be repeated, 'none' removes the cap)")
+	parser.add_argument('--json', help="write the results to this JSON file")
+	parser.add_argument('--csv', help="write the results to this CSV file")
+	args = parser.parse_args(argv)
+
+	engines = args.engines.split(',') if args.engines else None
+	for name in engines or []:
+		if name not in ENGINES:
+			parser.error("unknown engine: "+name)
+
+	caps = {}
+	for item in args.cap:
+		name, _, size = item.partition('=')
+		if name not in ENGINES or not size:
+			parser.error("invalid cap: "+item)
+		caps[name] = None if size.lower()=='none' else parse_int(size)
+
+	sizes = [parse_int(s) for s in args.sizes.split(',')]
+	rows = run(sizes, lower=parse_int(args.lower), engines=engines, repeats=args.repeats, warmup=args.warmup,
+		caps=caps, verbose=True)
+
+	if args.json:
+		write_json(rows, args.json)
+	if args.csv:
+		write_csv(rows, args.csv)
+	if not all(row['ok'] for row in rows):
+		sys.exit(1)
+
+if __name__=='__main__':
+	main()
@@ -2,10 +2,12 @@
 """
 coding=utf-8
 
-Python 3.5.2
+Python 3.8+
 
 Generate all the prime numbers between two given numbers A and B
 
+Usage: python primes_generator.py --from A --to B [--method METHOD] [--count-only] [--output FILE] [--format FORMAT]
+
 Warning(s): 
 1. Code does not handle exceptions or large inputs robustly
 
@@ -15,6 +17,25 @@ Warning(s):
 import sys
 import time
 import math
+import itertools
+import os
+import mmap
+import struct
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+# Optional dependency for the vectorized backends
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+# Optional dependency for locking the prime cache file (not available on Windows)
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
 
 def naive(A, B):
 	"""
@@ -47,95 +68,562 @@ def naive(A, B):
 
 	return primes
 
+def _odd_sieve(N):
+	"""
+	Odd-only Sieve of Eratosthenes over a bytearray
+
+	Index i of the returned buffer stands for the odd number 2i+1 and holds 1 if it is prime
+	Even numbers are never stored and the multiples of each prime are crossed off with a single
+	slice assignment, so the inner loop runs in C instead of the interpreter
+	Space Complexity: O(B/2) bytes
+
+	:return: Primality flags of the odd numbers 1, 3, 5, ... upto N
+	:rtype: bytearray
+	"""
+	size = (N+1)//2
+	sieve = bytearray([1]) * size
+	if size:
+		# 1 is not a prime
+		sieve[0] = 0
+
+	for i in range(1, (math.isqrt(max(N, 0))+1)//2):
+		if sieve[i]:
+			# Mark odd multiples of p starting from p*p, i.e. p*p, p*p+2p, p*p+4p, ...
+			p = 2*i+1
+			start = p*p//2
+			sieve[start::p] = bytes((size-1-start)//p + 1)
+
+	return sieve
+
 def eratosthenes(A, B):
 	"""
 	Sieve of Eratosthenes
 
 	Generates the list of primes between A and B (both inclusive)
+	Only the odd numbers are sieved, one byte each (see _odd_sieve)
 	Algorithm: https://en.wikipedia.org/wiki/Sieve_of_Eratosthenes
 	Time Complexity: O(B log log B)
-	Space Complexity: O(B)
+	Space Complexity: O(B/2) bytes for the sieve
 
 	:return: List of prime numbers
 	:rtype: List[int]
 	"""
-	# Mark all numbers as prime
-	N = B
-	primes = [True] * (N+1)
-	primes[0] = primes[1] = False
-
-	for p in range(N+1):
-		if primes[p]:
-			# Mark multiples of p by counting to N from 2p in increments of p, and mark them as False
-			# 2p, 3p, 4p, ...
-			for f in range(p*p, N+1, p):
-				primes[f] = False
+	if B<2:
+		return []
 
-	# The True indices mark the prime numbers
-	return [p for p in range(A, len(primes)) if primes[p]==True]
+	sieve = _odd_sieve(B)
+	primes = [2] if A<=2 else []
+
+	# The set flags mark the odd prime numbers, starting from the first odd number >= A
+	lo = max(A, 0)//2
+	primes.extend(itertools.compress(range(2*lo+1, B+1, 2), memoryview(sieve)[lo:]))
+	return primes
+
+def _sieve_segment(lo, hi, base):
+	"""
+	Helper function to sieve one segment of odd numbers
+
+	Sieves the odd numbers lo, lo+2, ... below hi (lo must be odd and at least 3) using the odd
+	base primes in base, which must contain every odd prime upto sqrt(hi)
+	Index i of the returned buffer stands for the odd number lo+2i and holds 1 if it is prime
+
+	:return: Primality flags of the odd numbers in [lo, hi)
+	:rtype: bytearray
+	"""
+	size = (hi-lo+1)//2
+	seg = bytearray([1]) * size
+	for p in base:
+		p2 = p*p
+		if p2>=hi:
+			break
+		# First odd multiple of p in the segment, but no smaller than p*p
+		start = max(p2, (lo+p-1)//p*p)
+		if not start&1:
+			start += p
+		start = (start-lo)//2
+		if start<size:
+			seg[start::p] = bytes((size-1-start)//p + 1)
+	return seg
+
+def _base_primes(B):
+	"""
+	Helper function to list the odd primes upto sqrt(B), as needed to sieve any segment below B+1
+
+	:return: List of odd prime numbers
+	:rtype: List[int]
+	"""
+	N = math.isqrt(max(B, 0))
+	return list(itertools.compress(range(1, N+1, 2), _odd_sieve(N)))
+
+# Default segment size for iter_primes (fits comfortably in a typical L2 cache)
+SEGMENT_BYTES = 1<<18
+
+def iter_primes(A, B, segment_bytes=SEGMENT_BYTES, resume_from=None):
+	"""
+	Streaming Segmented Sieve of Eratosthenes
+
+	Lazily yields the primes between A and B (both inclusive) in increasing order
+	Only the base primes upto sqrt(B) and a single segment of segment_bytes odd numbers are
+	held in memory at any time, so very long ranges can be scanned in constant memory
+	A scan can be checkpointed by remembering the last prime (or any number) it reached and
+	resumed later by passing it as resume_from, which restarts the scan just after it
+	Time Complexity: O(B log log B)
+	Space Complexity: O(sqrt(B) + segment_bytes)
+
+	:return: Generator of prime numbers
+	:rtype: Iterator[int]
+	"""
+	if resume_from is not None:
+		A = max(A, resume_from+1)
+	if B<2 or A>B:
+		return
+	if A<=2:
+		yield 2
+
+	base = _base_primes(B)
+	span = 2*max(segment_bytes, 1)
+
+	# Segments always start at an odd number
+	lo = max(A, 3) | 1
+	while lo<=B:
+		hi = min(lo+span, B+1)
+		seg = _sieve_segment(lo, hi, base)
+		yield from itertools.compress(range(lo, hi, 2), seg)
+		lo += span
+
+# Base primes of a parallel_primes worker process (set once per process by _init_worker)
+_worker_base = []
+
+def _init_worker(base):
+	"""
+	Process pool initializer that hands the base primes to a worker once, instead of per shard
+
+	:return: None
+	:rtype: None
+	"""
+	global _worker_base
+	_worker_base = base
+
+def _sieve_shard(task):
+	"""
+	Helper function run by the parallel_primes workers
+
+	Sieves the odd numbers of the shard [lo, hi) one segment at a time and reduces them to a
+	compact result: the number of primes, their sum, or the raw primality flags
+
+	:return: Count, sum or flags (as in _sieve_segment) of the primes in the shard
+	:rtype: int or bytes
+	"""
+	lo, hi, query, segment_bytes = task
+	span = 2*segment_bytes
+	res = 0 if query!='list' else bytearray()
+	while lo<hi:
+		top = min(lo+span, hi)
+		seg = _sieve_segment(lo, top, _worker_base)
+		if query=='count':
+			res += seg.count(1)
+		elif query=='sum':
+			res += sum(itertools.compress(range(lo, top, 2), seg))
+		else:
+			res += seg
+		lo = top
+	return res if query!='list' else bytes(res)
+
+def parallel_primes(A, B, workers=None, query='count', segment_bytes=SEGMENT_BYTES):
+	"""
+	Parallel Segmented Sieve of Eratosthenes
+
+	Counts, sums or lists the primes between A and B (both inclusive) on several processes
+	The base primes upto sqrt(B) are computed once and sent to each worker when it starts; the
+	range is then split into shards which the workers sieve segment by segment (see iter_primes)
+	Workers only send back a count, a sum or one flag byte per odd number, never lists of ints,
+	and the shard results are combined in order
+	Time Complexity: O(B log log B / workers)
+	Space Complexity: O(sqrt(B) + segment_bytes) per worker, plus the result for 'list'
+
+	:return: Number of primes ('count'), their sum ('sum') or the list of primes ('list')
+	:rtype: int or List[int]
+	"""
+	if query not in ('count', 'sum', 'list'):
+		raise ValueError("query must be one of 'count', 'sum' or 'list'")
+	workers = workers or os.cpu_count() or 1
+	segment_bytes = max(segment_bytes, 1)
+
+	res = [] if query=='list' else 0
+	if B<2 or A>B:
+		return res
+	if A<=2:
+		res = [2] if query=='list' else 2 if query=='sum' else 1
+
+	# Split the odd numbers of the range into a few shards per worker, each an even length
+	lo = max(A, 3) | 1
+	if lo>B:
+		return res
+	shard = max(2*segment_bytes, -(-(B+1-lo)//(4*workers)))
+	shard += shard&1
+	tasks = [(a, min(a+shard, B+1), query, segment_bytes) for a in range(lo, B+1, shard)]
+
+	base = _base_primes(B)
+	if workers==1:
+		_init_worker(base)
+		results = map(_sieve_shard, tasks)
+	else:
+		executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(base,))
+		results = executor.map(_sieve_shard, tasks)
+
+	try:
+		for (a, b, _, _), out in zip(tasks, results):
+			if query=='list':
+				res.extend(itertools.compress(range(a, b, 2), out))
+			else:
+				res += out
+	finally:
+		if workers>1:
+			executor.shutdown()
+
+	return res
 
 def segmented_eratosthenes(A, B):
 	"""
 	Segmented Sieve of Eratosthenes
 
 	Generates the list of primes between A and B (both inclusive)
+	The range is sieved one cache-sized segment at a time (see iter_primes)
 	Time Complexity: O(B log log B)
-	Space Complexity: O(B)
-
-	Adapted from: https://github.com/andrewstewart/segsieve/blob/master/primes.py
+	Space Complexity: O(sqrt(B) + segment size), plus the returned list
 
 	:return: List of prime numbers
 	:rtype: List[int]
 	"""
+	return list(iter_primes(A, B))
 
-	_prime1000 = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97, 101, 103, 107, 109, 113, 127, 131, 137, 139, 149, 151, 157, 163, 167, 173, 179, 181, 191, 193, 197, 199, 211, 223, 227, 229, 233, 239, 241, 251, 257, 263, 269, 271, 277, 281, 283, 293, 307, 311, 313, 317, 331, 337, 347, 349, 353, 359, 367, 373, 379, 383, 389, 397, 401, 409, 419, 421, 431, 433, 439, 443, 449, 457, 461, 463, 467, 479, 487, 491, 499, 503, 509, 521, 523, 541, 547, 557, 563, 569, 571, 577, 587, 593, 599, 601, 607, 613, 617, 619, 631, 641, 643, 647, 653, 659, 661, 673, 677, 683, 691, 701, 709, 719, 727, 733, 739, 743, 751, 757, 761, 769, 773, 787, 797, 809, 811, 821, 823, 827, 829, 839, 853, 857, 859, 863, 877, 881, 883, 887, 907, 911, 919, 929, 937, 941, 947, 953, 967, 971, 977, 983, 991, 997]
-	if B<1000:
-		return [p for p in _prime1000 if p>=A and p<=B]
-
-	segfactor = 0.2
-	delta = int(math.ceil(math.sqrt(B-A)*abs(segfactor)))
-
-	sep = (B-A)//delta + 1
-	primes = segmented_eratosthenes(2, int(math.sqrt(B))+1)
-	primes2 = segmented_eratosthenes(2, int(math.sqrt(sep)+1))
-	q = len(primes2)
-	while q>0 and primes2[0]<A:
-		primes2.pop(0)
-		q -= 1
-	a = A
-	while a<B:
-		if a+sep>B:
-			sep = B-a
-		b = [True] * sep
-		if a<2:
-			if a==1:
-				b[0] = False
-			if a==0:
-				b[:1] = [False, False]
-		stop2 = int(math.ceil(math.sqrt(a + sep)))
-		for c in primes:
-			if c>stop2:
-				break
-			q = a%c
-			if q!=0:
-				d = a-q+c
+def _prime_pi(x):
+	"""
+	Helper function to compute pi(x), the number of primes upto x, without listing them
+
+	Lucy_Hedgehog's method: S(v, p) counts the numbers in [2, v] that are prime or have no prime
+	factor below p; only the O(sqrt(x)) distinct values v = x//i are needed, and sieving by each
+	prime p upto sqrt(x) updates them with S(v, p) = S(v, p-1) - (S(v//p, p-1) - S(p-1, p-1))
+	small[v] holds S(v) for v <= sqrt(x) and large[i] holds S(x//i)
+	With NumPy, x from PI_NUMPY_MIN on is handled by _prime_pi_numpy (pi(10^12) in about 4 seconds)
+	Time Complexity: O(x^(3/4))
+	Space Complexity: O(sqrt(x))
+
+	:return: Number of primes upto x
+	:rtype: int
+	"""
+	if x<2:
+		return 0
+	if np is not None and PI_NUMPY_MIN<=x<1<<62:
+		return _prime_pi_numpy(x)
+	r = math.isqrt(x)
+	small = [0] + [v-1 for v in range(1, r+1)]
+	large = [0] + [x//i-1 for i in range(1, r+1)]
+
+	for p in range(2, r+1):
+		if small[p]==small[p-1]:
+			# p is not a prime
+			continue
+		sp = small[p-1]
+		p2 = p*p
+		lim = min(r, x//p2)
+		split = min(lim, r//p)
+		# x//(i*p) is a large value while i*p <= r, and a small one after that
+		for i in range(1, split+1):
+			large[i] -= large[i*p]-sp
+		for i in range(split+1, lim+1):
+			large[i] -= small[x//(i*p)]-sp
+		for v in range(r, p2-1, -1):
+			small[v] -= small[v//p]-sp
+
+	return large[1]
+
+# Smallest x for which _prime_pi switches to the NumPy version, below which the array overhead dominates
+PI_NUMPY_MIN = 1<<20
+
+def _prime_pi_numpy(x):
+	"""
+	Helper function to compute pi(x) with NumPy (x < 2^62), see _prime_pi
+
+	Every update of the pure Python loops over large and small becomes one array operation per
+	prime; once p*p > sqrt(x), small holds pi(v) and no longer changes, so the remaining primes are
+	read off it instead of being tested one by one
+	x//(i*p) is computed as a float division of x//p by i, which is exact below 2^53
+
+	:return: Number of primes upto x
+	:rtype: int
+	"""
+	r = math.isqrt(x)
+	idx = np.arange(r+1, dtype=np.int64)
+	idxf = idx.astype(np.float64) if x<1<<53 else None
+	small = (idx-1).astype(np.int32)
+	small[0] = 0
+	large = np.zeros(r+1, dtype=np.int64)
+	large[1:] = x//idx[1:]-1
+
+	def sieve(p):
+		sp = int(small[p-1])
+		p2 = p*p
+		lim = min(r, x//p2)
+		split = min(lim, r//p)
+		large[1:split+1] -= large[p:p*split+1:p]-sp
+		if lim>split:
+			if idxf is not None:
+				q = (float(x//p)/idxf[split+1:lim+1]).astype(np.int64)
 			else:
-				d = a
-			while d<a+sep:
-				b[d-a] = False
-				d += c
-		for c in range(sep):
-			if b[c]:
-				primes2.append(a+c)
-		a += sep
+				q = (x//p)//idx[split+1:lim+1]
+			t = small[q]
+			t -= sp
+			large[split+1:lim+1] -= t
+		if p2<=r:
+			small[p2:] -= small[idx[p2:]//p]-sp
+
+	r2 = math.isqrt(r)
+	for p in range(2, r2+1):
+		if small[p]!=small[p-1]:
+			sieve(p)
+	for p in (np.flatnonzero(np.diff(small[r2:]))+r2+1).tolist():
+		sieve(p)
+
+	return int(large[1])
+
+def prime_count(A, B):
+	"""
+	Prime counting function
 
-	return primes2
+	Counts the primes between A and B (both inclusive) as pi(B) - pi(A-1), without sieving or
+	listing the primes in the range
+	Algorithm: https://en.wikipedia.org/wiki/Prime-counting_function#Algorithms_for_evaluating_%CF%80(x)
+	Time Complexity: O(B^(3/4))
+	Space Complexity: O(sqrt(B))
 
-def atkin(A, B):
+	:return: Number of prime numbers
+	:rtype: int
+	"""
+	if A>B:
+		return 0
+	return _prime_pi(B) - _prime_pi(A-1)
+
+# Small primes used to prefilter candidates before the probabilistic tests
+_SMALL_PRIMES = tuple(eratosthenes(0, 1000))
+
+# Miller-Rabin bases that are deterministic for every n < 2^64
+# Source: https://miller-rabin.appspot.com/
+_MR_BASES_64 = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+
+def _jacobi(a, n):
+	"""
+	Helper function to compute the Jacobi symbol (a/n) for an odd positive n
+
+	:return: -1, 0 or 1
+	:rtype: int
+	"""
+	a %= n
+	res = 1
+	while a:
+		while not a&1:
+			a >>= 1
+			if n&7 in (3, 5):
+				res = -res
+		a, n = n, a
+		if a&3==3 and n&3==3:
+			res = -res
+		a %= n
+	return res if n==1 else 0
+
+def _miller_rabin(n, bases):
+	"""
+	Helper function running the strong probable prime test on an odd n > 2 for each base
+
+	:return: False if some base proves n composite, True otherwise
+	:rtype: bool
+	"""
+	d = n-1
+	s = 0
+	while not d&1:
+		d >>= 1
+		s += 1
+	for a in bases:
+		a %= n
+		if a==0:
+			continue
+		x = pow(a, d, n)
+		if x==1 or x==n-1:
+			continue
+		for _ in range(s-1):
+			x = x*x % n
+			if x==n-1:
+				break
+		else:
+			return False
+	return True
+
+def _strong_lucas(n):
+	"""
+	Helper function running the strong Lucas probable prime test on an odd n > 2
+	Parameters are chosen with Selfridge's method A (P = 1, Q = (1-D)/4)
+	Algorithm: https://en.wikipedia.org/wiki/Lucas_pseudoprime#Strong_Lucas_pseudoprimes
+
+	:return: False if n is proved composite, True otherwise
+	:rtype: bool
+	"""
+	# No suitable D exists for perfect squares
+	if math.isqrt(n)**2==n:
+		return False
+	D = 5
+	while True:
+		j = _jacobi(D, n)
+		if j==-1:
+			break
+		if j==0 and abs(D)!=n:
+			return False
+		D = -D-2 if D>0 else -D+2
+	P, Q = 1, (1-D)//4
+
+	# n+1 = d * 2^s with d odd
+	d = n+1
+	s = 0
+	while not d&1:
+		d >>= 1
+		s += 1
+
+	# Compute U_d, V_d and Q^d by walking the bits of d from the top
+	U, V, Qk = 0, 2, 1
+	for bit in bin(d)[2:]:
+		U = U*V % n
+		V = (V*V - 2*Qk) % n
+		Qk = Qk*Qk % n
+		if bit=='1':
+			U, V = P*U + V, D*U + P*V
+			if U&1:
+				U += n
+			if V&1:
+				V += n
+			U = (U>>1) % n
+			V = (V>>1) % n
+			Qk = Qk*Q % n
+
+	if U==0 or V==0:
+		return True
+	for _ in range(s-1):
+		V = (V*V - 2*Qk) % n
+		Qk = Qk*Qk % n
+		if V==0:
+			return True
+	return False
+
+def _probable_prime(n):
+	"""
+	Helper function testing an odd n with no prime factor below 1000
+
+	Deterministic Miller-Rabin below 2^64, Baillie-PSW (no known counterexample) above
+
+	:return: True if n is (probably) prime, False otherwise
+	:rtype: bool
+	"""
+	if n<1000*1000:
+		return True
+	if n<(1<<64):
+		return _miller_rabin(n, _MR_BASES_64)
+	return _miller_rabin(n, (2,)) and _strong_lucas(n)
+
+def is_prime(n):
+	"""
+	Primality test
+
+	Checks whether n is a prime number by trial division with the primes below 1000, followed
+	by a deterministic Miller-Rabin test for n < 2^64 and the Baillie-PSW test for larger n
+	Algorithm: https://en.wikipedia.org/wiki/Baillie%E2%80%93PSW_primality_test
+	Time Complexity: O(log^3 n)
+	Space Complexity: O(1)
+
+	:return: True if n is prime, False otherwise
+	:rtype: bool
+	"""
+	if n<2:
+		return False
+	for p in _SMALL_PRIMES:
+		if n%p==0:
+			return n==p
+	return _probable_prime(n)
+
+def primes_in_window(A, B):
+	"""
+	Primes in a narrow window
+
+	Generates the list of primes between A and B (both inclusive) for a narrow window far from 0
+	The window is first sieved with the primes below 1000 and only the survivors are tested with
+	the probabilistic tests of is_prime, so no sieve upto sqrt(B) is needed
+	Time Complexity: O((B-A) log^3 B / log 1000)
+	Space Complexity: O(B-A)
+
+	:return: List of prime numbers
+	:rtype: List[int]
+	"""
+	A = max(A, 0)
+	if A>B:
+		return []
+	size = B-A+1
+	candidates = bytearray([1]) * size
+	for n in range(A, min(2, B+1)):
+		candidates[n-A] = 0
+
+	for p in _SMALL_PRIMES:
+		# Cross off multiples of p, but not p itself
+		start = max(p*p, (A+p-1)//p*p) - A
+		if start<size:
+			candidates[start::p] = bytes((size-1-start)//p + 1)
+
+	return [n for n in itertools.compress(range(A, B+1), candidates) if _probable_prime(n)]
+
+def _atkin_numpy(A, B):
+	"""
+	NumPy backend of the Sieve of Atkin
+
+	For each x the three quadratic forms are evaluated for all y at once; the values in one row
+	are distinct, so each row toggles its matching flags with a single fancy-indexed XOR
+
+	:return: List of prime numbers
+	:rtype: List[int]
+	"""
+	N = B
+	primes = np.zeros(N+1, dtype=bool)
+	primes[2] = primes[3] = True
+	ys = np.arange(1, math.isqrt(N)+1, dtype=np.int64)
+	ys2 = ys*ys
+
+	x = 1
+	while x*x<N:
+		# a) p = (4*x*x)+(y*y) with p % 12 = 1 or p % 12 = 5
+		if 4*x*x<N:
+			p = 4*x*x + ys2[:math.isqrt(N-4*x*x)]
+			r = p%12
+			primes[p[(r==1) | (r==5)]] ^= True
+
+		# b) p = (3*x*x)+(y*y) with p % 12 = 7
+		if 3*x*x<N:
+			p = 3*x*x + ys2[:math.isqrt(N-3*x*x)]
+			primes[p[p%12==7]] ^= True
+
+		# c) p = (3*x*x)-(y*y) with x > y and p % 12 = 11
+		p = 3*x*x - ys2[:x-1]
+		primes[p[(p<=N) & (p%12==11)]] ^= True
+		x += 1
+
+	# Mark all multiples of squares
+	for r in range(5, math.isqrt(N)+1):
+		if primes[r]:
+			primes[r*r::r*r] = False
+
+	return (np.flatnonzero(primes[A:]) + A).tolist()
+
+def atkin(A, B, backend='python'):
 	"""
 	Sieve of Atkin
 
 	Generates the list of primes between A and B (both inclusive)
+	With backend='numpy' the quadratic forms are evaluated as array operations (see _atkin_numpy),
+	falling back to pure Python when NumPy is not installed
 	Algorithm: https://en.wikipedia.org/wiki/Sieve_of_Atkin
 	Time Complexity: O(B / (log log B))
 	Space Complexity: O(B)
@@ -143,6 +631,9 @@ def atkin(A, B):
 	:return: List of prime numbers
 	:rtype: List[int]
 	"""
+	if backend=='numpy' and np is not None and B>=3:
+		return _atkin_numpy(max(A, 0), B)
+
 	N = B
 	primes = []
 	if B<3:
@@ -174,7 +665,7 @@ def atkin(A, B):
 
 	# Mark all multiples of squares
 	r = 5
-	while r*r<N: 
+	while r*r<=N: 
 		if primes[r]: 
 			for f in range(r*r, B+1, r*r): 
 				primes[f] = False
@@ -183,11 +674,38 @@ def atkin(A, B):
 	# The True indices mark the prime numbers
 	return [p for p in range(A, len(primes)) if primes[p]==True]
 
-def sundaram(A, B):
+def _sundaram_numpy(A, B):
+	"""
+	NumPy backend of the Sieve of Sundaram
+
+	For a fixed i the crossed numbers i+j+2ij (j >= i) form the arithmetic progression starting at
+	2i(i+1) with step 2i+1, so each i is a single strided slice assignment
+
+	:return: List of prime numbers
+	:rtype: List[int]
+	"""
+	N = (B-1)//2
+	not_primes = np.zeros(N+1, dtype=bool)
+	not_primes[0] = True
+
+	i = 1
+	while 2*i*(i+1)<=N:
+		not_primes[2*i*(i+1)::2*i+1] = True
+		i += 1
+
+	primes = 2*np.flatnonzero(~not_primes) + 1
+	primes = primes[primes>=A].tolist()
+	if A<=2:
+		return [2]+primes
+	return primes
+
+def sundaram(A, B, backend='python'):
 	"""
 	Sieve of Sundaram
 
 	Generates the list of primes between A and B (both inclusive)
+	With backend='numpy' the crossings are strided array assignments (see _sundaram_numpy),
+	falling back to pure Python when NumPy is not installed
 	Algorithm: https://en.wikipedia.org/wiki/Sieve_of_Sundaram
 	Time Complexity: O(B log B)
 	Space Complexity: O(B)
@@ -195,9 +713,11 @@ def sundaram(A, B):
 	:return: List of prime numbers
 	:rtype: List[int]
 	"""
+	if backend=='numpy' and np is not None and B>=2:
+		return _sundaram_numpy(A, B)
 
 	# Get new limit
-	N = int((B-2)/2)
+	N = (B-1)//2
 	# Mark all as False
 	not_primes = [False] * (N+1)
 
@@ -211,99 +731,390 @@ def sundaram(A, B):
 		return [2]+[2*p+1 for p in range(1, N+1) if not_primes[p]==False and (2*p+1)>=A and (2*p+1)<=B]
 	return [2*p+1 for p in range(1, N+1) if not_primes[p]==False and (2*p+1)>=A and (2*p+1)<=B]
 
-def main():
+# Translation tables between primality flags (bytes 0 and 1) and the digits of a binary string
+_FLAGS_TO_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+_DIGITS_TO_FLAGS = bytes.maketrans(b'01', b'\x00\x01')
+
+def _pack_flags(flags):
+	"""
+	Helper function to pack primality flags into bits, 8 flags per byte and the first one in the
+	lowest bit (with NumPy if available, else by reading the flags as the digits of one binary
+	number, so the work runs in C either way)
+
+	:return: Packed bits, the last byte padded with zeros
+	:rtype: bytes
+	"""
+	if not flags:
+		return b''
+	if np is not None:
+		return np.packbits(np.frombuffer(flags, dtype=np.uint8), bitorder='little').tobytes()
+	return int(flags.translate(_FLAGS_TO_DIGITS)[::-1], 2).to_bytes((len(flags)+7)//8, 'little')
+
+def _unpack_flags(bits, n):
+	"""
+	Helper function to unpack the n lowest bits of an int into primality flags, lowest bit first
+
+	:return: Primality flags
+	:rtype: bytes
+	"""
+	if not n:
+		return b''
+	return format(bits, 'b').zfill(n)[::-1].encode('ascii').translate(_DIGITS_TO_FLAGS)
+
+def _popcount(bits):
+	"""
+	Helper function to count the set bits of a non-negative int
+
+	:return: Number of set bits
+	:rtype: int
+	"""
+	return bin(bits).count('1')
+
+if hasattr(int, 'bit_count'):
+	_popcount = int.bit_count
+
+class PrimeCache(object):
+	"""
+	Persistent prime table
+
+	An on-disk packed odd-only sieve: a small header followed by one bit per odd number 1, 3, 5, ...
+	(8 per byte, lowest bit first), opened through mmap so that lookups inside the sieved range read
+	the mapped file directly instead of sieving again
+	Queries beyond the sieved range extend the file segment by segment from where it stopped
+	Several processes can share the file; readonly instances never write and pick up extensions
+	made by other processes, while writers serialize their extensions with a file lock
+	"""
+
+	MAGIC = b'PRIMEBIT'
+	# Magic bytes and number of odd bits stored after the header
+	HEADER = struct.Struct('<8sQ')
+
+	def __init__(self, path, readonly=False, segment_bytes=SEGMENT_BYTES):
+		self.path = path
+		self.readonly = readonly
+		self.segment_bytes = max(segment_bytes, 1)
+		if not readonly and not os.path.exists(path):
+			with open(path, 'wb') as f:
+				f.write(self.HEADER.pack(self.MAGIC, 0))
+		self._file = open(path, 'rb' if readonly else 'r+b', buffering=0)
+		self._map = None
+		self._count = 0
+		self._remap()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def close(self):
+		"""
+		Releases the mapping and the file
+
+		:return: None
+		:rtype: None
+		"""
+		if self._map is not None:
+			self._map.close()
+			self._map = None
+		self._file.close()
+
+	@property
+	def limit(self):
+		"""
+		Largest number covered by the table
+
+		:return: Upper limit of the sieved range
+		:rtype: int
+		"""
+		return 2*self._count
+
+	def _remap(self):
+		"""
+		Helper method to read the header and map the bits written so far
+
+		:return: None
+		:rtype: None
+		"""
+		self._file.seek(0)
+		magic, count = self.HEADER.unpack(self._file.read(self.HEADER.size))
+		if magic!=self.MAGIC:
+			raise ValueError("Not a prime cache file: "+self.path)
+		if self._map is not None:
+			self._map.close()
+			self._map = None
+		self._count = count
+		if count:
+			self._map = mmap.mmap(self._file.fileno(), self.HEADER.size+(count+7)//8, access=mmap.ACCESS_READ)
+
+	def _bits(self, i, j):
+		"""
+		Helper method reading the bits of the odd numbers 2i+1, ..., 2j-1 from the mapped file
+
+		:return: The bits as an int, the one of 2i+1 lowest
+		:rtype: int
+		"""
+		data = self._map[self.HEADER.size+i//8:self.HEADER.size+(j+7)//8]
+		return (int.from_bytes(data, 'little') >> (i&7)) & ((1<<(j-i))-1)
+
+	def extend(self, B):
+		"""
+		Extends the table so that it covers every number upto B
+
+		Only the part beyond the current limit is sieved, one segment at a time, and the new bits
+		are appended to the file before the header is updated, so readers never see partial data
+
+		:return: None
+		:rtype: None
+		"""
+		if B<=self.limit:
+			return
+		self._remap()
+		if B<=self.limit:
+			return
+		if self.readonly:
+			raise ValueError("Prime cache opened read-only only covers upto %d" %(self.limit))
+
+		if fcntl is not None:
+			fcntl.flock(self._file, fcntl.LOCK_EX)
+		try:
+			# Another writer may have extended the file while we waited for the lock
+			self._remap()
+			count = self._count
+			# Drop anything past the header count left behind by an interrupted extension, and
+			# restart from the last partial byte (rewritten with the same leading bits, as readers
+			# may have it mapped)
+			self._file.truncate(self.HEADER.size+(count+7)//8)
+			self._file.seek(self.HEADER.size+count//8)
+			count -= count%8
+
+			base = _base_primes(B)
+			# Segments of segment_bytes packed bytes, so every one but the last fills whole bytes
+			span = 16*self.segment_bytes
+			lo = 2*count+1
+			while lo<=B:
+				hi = min(lo+span, B+1)
+				if lo==1:
+					# 1 is not a prime
+					seg = b'\x00'+_sieve_segment(3, hi, base)
+				else:
+					seg = _sieve_segment(lo, hi, base)
+				self._file.write(_pack_flags(seg))
+				count += len(seg)
+				lo = hi
+			self._file.flush()
+			os.fsync(self._file.fileno())
+
+			self._file.seek(0)
+			self._file.write(self.HEADER.pack(self.MAGIC, count))
+			self._file.flush()
+		finally:
+			if fcntl is not None:
+				fcntl.flock(self._file, fcntl.LOCK_UN)
+		self._remap()
+
+	def is_prime(self, n):
+		"""
+		Checks whether n is a prime number, extending the table if needed
+
+		:return: True if n is prime, False otherwise
+		:rtype: bool
+		"""
+		if n<3 or not n&1:
+			return n==2
+		self.extend(n)
+		i = n//2
+		return (self._map[self.HEADER.size+i//8] >> (i&7)) & 1==1
+
+	def primes(self, A, B):
+		"""
+		Generates the list of primes between A and B (both inclusive), extending the table if needed
+
+		:return: List of prime numbers
+		:rtype: List[int]
+		"""
+		if B<2 or A>B:
+			return []
+		self.extend(B)
+		primes = [2] if A<=2 else []
+		# Bits of the odd numbers from max(A, 1) upto B, a segment at a time
+		end = (B+1)//2
+		span = 8*self.segment_bytes
+		for i in range(max(A, 1)//2, end, span):
+			j = min(i+span, end)
+			primes.extend(itertools.compress(range(2*i+1, 2*j, 2), _unpack_flags(self._bits(i, j), j-i)))
+		return primes
+
+	def count(self, A, B):
+		"""
+		Counts the primes between A and B (both inclusive), extending the table if needed
+
+		:return: Number of prime numbers
+		:rtype: int
+		"""
+		if B<2 or A>B:
+			return 0
+		self.extend(B)
+		res = 1 if A<=2 else 0
+		end = (B+1)//2
+		span = 8*self.segment_bytes
+		for i in range(max(A, 1)//2, end, span):
+			res += _popcount(self._bits(i, min(i+span, end)))
+		return res
+
+# Number of primes formatted and written per write() call
+WRITE_CHUNK = 1<<16
+
+# Size of the .npy header written by write_primes; fixed so that the shape can be patched in place
+_NPY_HEADER_LEN = 128
+
+def _npy_header(count):
+	"""
+	Helper function to build a version 1.0 .npy header for a little-endian uint64 vector
+
+	:return: Header bytes, _NPY_HEADER_LEN long
+	:rtype: bytes
+	"""
+	header = "{'descr': '<u8', 'fortran_order': False, 'shape': (%d,), }" %(count)
+	header = header.ljust(_NPY_HEADER_LEN-10-1) + '\n'
+	return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+def write_primes(primes, f, fmt='text'):
+	"""
+	Writes primes to a binary file object in chunks, without building the whole output at once
+
+	text: one decimal number per line
+	binary: raw little-endian uint64 values
+	npy: a NumPy .npy uint64 vector (the file must be seekable, as the length is patched in at the end)
+
+	:return: Number of primes written
+	:rtype: int
+	"""
+	primes = iter(primes)
+	count = 0
+	if fmt=='npy':
+		start = f.tell()
+		f.write(_npy_header(0))
+
+	while True:
+		chunk = list(itertools.islice(primes, WRITE_CHUNK))
+		if not chunk:
+			break
+		count += len(chunk)
+		if fmt=='text':
+			f.write(('\n'.join(map(str, chunk)) + '\n').encode('ascii'))
+		else:
+			chunk = array('Q', chunk)
+			if sys.byteorder=='big':
+				chunk.byteswap()
+			f.write(chunk.tobytes())
+
+	if fmt=='npy':
+		end = f.tell()
+		f.seek(start)
+		f.write(_npy_header(count))
+		f.seek(end)
+	f.flush()
+	return count
+
+# Method names accepted on the command line, with their descriptions
+METHODS = {
+	'naive': "Naive Method",
+	'eratosthenes': "Sieve of Eratosthenes",
+	'segmented': "Segmented Sieve of Eratosthenes",
+	'atkin': "Sieve of Atkin",
+	'sundaram': "Sieve of Sundaram",
+	'window': "Miller-Rabin window test",
+	'parallel': "Parallel Segmented Sieve of Eratosthenes",
+	'cache': "Prime cache",
+	'count': "Prime counting function",
+	'all': "All methods (benchmark)",
+}
+
+def main(argv=None):
 	"""
 	Main method
 
-	Takes user input and prints the list of primes
+	Parses the command line and writes the list (or only the number) of primes between A and B
+	Primes are streamed to stdout or to the output file; the summary line goes to stderr
 
 	:return: None
 	:rtype: None
 	"""
+	parser = argparse.ArgumentParser(description="Generate all the prime numbers between two given numbers A and B")
+	parser.add_argument('--from', dest='A', type=int, default=0, help="lower limit A (default: %(default)s)")
+	parser.add_argument('--to', dest='B', type=int, required=True, help="upper limit B")
+	parser.add_argument('--method', choices=list(METHODS), help="engine to use (default: segmented, or count with --count-only)")
+	parser.add_argument('--count-only', action='store_true', help="only print the number of primes")
+	parser.add_argument('--output', help="write the primes to this file instead of stdout")
+	parser.add_argument('--format', choices=['text', 'binary', 'npy'], default='text', help="output format (default: %(default)s)")
+	parser.add_argument('--backend', choices=['python', 'numpy'], default='python', help="backend of atkin and sundaram (default: %(default)s)")
+	parser.add_argument('--workers', type=int, help="worker processes of the parallel method (default: all cores)")
+	parser.add_argument('--cache', default='primes.cache', help="file of the cache method (default: %(default)s)")
+	args = parser.parse_args(argv)
 
-	# Take user input
-	A = int(input("Enter lower limit (A): "))
-	B = int(input("Enter upper limit (B): "))
-	print ("""
-	1. Naive Method
-	2. Sieve of Eratosthenes
-	3. Segmented Eratosthenes
-	4. Sieve of Atkin
-	5. Sieve of Sundaram
-	6. All
-	""")
-	method = int(input("Choose method (1-6): "))
-	prompt = input("Print the list of primes? (Y/N): ")
-	if prompt=='Y' or prompt=='y':
-		prompt = 1
-	else:
-		prompt = 0
-	
+	A, B = args.A, args.B
+	method = args.method or ('count' if args.count_only else 'segmented')
+	if method=='count':
+		# The prime counting function never lists the primes
+		args.count_only = True
 
 	# Check for invalid input
 	if A>B:
 		print("Invalid input. Exiting...", file=sys.stderr)
-		return
-	if not A or A<0:
+		sys.exit(1)
+	if A<0:
 		A = 0
-	if B<=1:
-		print("Found 0 primes")
+	if args.format=='npy' and not args.output:
+		parser.error("--format npy needs --output")
+
+	if method=='all':
+		# Imported here since the benchmark suite imports this module
+		import primes_benchmark
+		primes_benchmark.print_table(primes_benchmark.run([B], lower=A, repeats=3, warmup=1))
 		return
-	
-	starttime = time.time()
-	if method==1:
-		res = naive(A, B)
-	elif method==2:
-		res = eratosthenes(A, B)
-	elif method==3:
-		res = segmented_eratosthenes(A, B)
-	elif method==4:
-		res = atkin(A, B)
-	elif method==5:
-		res = sundaram(A, B)
-	endtime = time.time()
-
-	# Print answer
-	if method==1:
-		print("Using Naive Method -> Found %d primes in %f seconds" %(len(res), endtime-starttime))
-	elif method==2:
-		print("Using Sieve of Eratosthenes -> Found %d primes in %f seconds" %(len(res), endtime-starttime))
-	elif method==3:
-		print("Using Segmented Sieve of Eratosthenes -> Found %d primes in %f seconds" %(len(res), endtime-starttime))
-	elif method==4:
-		print("Using Sieve of Atkin -> Found %d primes in %f seconds" %(len(res), endtime-starttime))
-	elif method==5:
-		print("Using Sieve of Sundaram -> Found %d primes in %f seconds" %(len(res), endtime-starttime))
+
+	starttime = time.perf_counter()
+	if args.count_only and method=='count':
+		count = prime_count(A, B)
+	elif args.count_only and method=='parallel':
+		count = parallel_primes(A, B, workers=args.workers)
+	elif args.count_only and method=='cache':
+		with PrimeCache(args.cache) as cache:
+			count = cache.count(A, B)
 	else:
-		print("Sl\tMethod\t\t# Primes\tTime (s)")
-		
-		starttime = time.time()
-		res = naive(A, B)
-		endtime = time.time()
-		print("1\tNaive\t\t%d\t\t%f" %(len(res), endtime-starttime))
-		
-		starttime = time.time()
-		res = eratosthenes(A, B)
-		endtime = time.time()
-		print("2\tEratosthenes\t%d\t\t%f" %(len(res), endtime-starttime))
-		
-		starttime = time.time()
-		res = segmented_eratosthenes(A, B)
-		endtime = time.time()
-		print("3\tSeg-Eratos\t%d\t\t%f" %(len(res), endtime-starttime))
-		
-		starttime = time.time()
-		res = atkin(A, B)
-		endtime = time.time()
-		print("4\tAtkin\t\t%d\t\t%f" %(len(res), endtime-starttime))
-		
-		starttime = time.time()
-		res = sundaram(A, B)
-		endtime = time.time()
-		print("5\tSundaram\t%d\t\t%f" %(len(res), endtime-starttime))
-	
-	if prompt:
-		print(res)
+		if method=='naive':
+			res = naive(A, B) if B>1 else []
+		elif method=='eratosthenes':
+			res = eratosthenes(A, B)
+		elif method=='atkin':
+			res = atkin(A, B, backend=args.backend) if B>1 else []
+		elif method=='sundaram':
+			res = sundaram(A, B, backend=args.backend) if B>1 else []
+		elif method=='window':
+			res = primes_in_window(A, B)
+		elif method=='parallel':
+			res = parallel_primes(A, B, workers=args.workers, query='list')
+		elif method=='cache':
+			with PrimeCache(args.cache) as cache:
+				res = cache.primes(A, B)
+		else:
+			# The segmented sieve streams, so the primes are written as they are found
+			res = iter_primes(A, B)
+
+		if args.count_only:
+			count = sum(1 for _ in res)
+		elif args.output:
+			with open(args.output, 'wb') as f:
+				count = write_primes(res, f, args.format)
+		else:
+			count = write_primes(res, sys.stdout.buffer, args.format)
+	if args.count_only:
+		print(count)
+	endtime = time.perf_counter()
+
+	# Print summary
+	print("Using %s -> Found %d primes in %f seconds" %(METHODS[method], count, endtime-starttime), file=sys.stderr)
 
 if __name__=='__main__':
 	main()